@@ -0,0 +1,158 @@
+"""Benchmarks for backend hot paths.
+
+Run from the backend directory against a seeded database:
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=test_database python bench.py round-trips
+
+The round-trips benchmark runs the server's startup (indexes, search index, leaderboards)
+first, so requests take the same paths as in production. The serialize benchmark sends no
+queries, but importing the server still needs MONGO_URL and DB_NAME set.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+
+import httpx
+import orjson
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+import server
+from seed_data import CATEGORIES, DESCRIPTIONS, DISTRICTS
+
+# Representative discovery queries, from broad to narrow
+SERVICE_QUERIES = [
+    {},
+    {"category": "Bore Well"},
+    {"district": "Chennai"},
+    {"district": "Chennai", "category": "Lorry Services"},
+    {"keyword": "water"},
+]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands sent by the client it is registered on."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def use_counting_client() -> CommandCounter:
+    counter = CommandCounter()
+    server.client = AsyncIOMotorClient(server.mongo_url, event_listeners=[counter])
+    server.db = server.client[server.os.environ['DB_NAME']]
+    return counter
+
+
+async def bench_round_trips(repeat: int):
+    counter = use_counting_client()
+    # ASGITransport does not run the app lifespan, so start the services it would
+    await server.start_services()
+    try:
+        await measure_round_trips(counter, repeat)
+    finally:
+        await server.stop_services()
+
+
+async def measure_round_trips(counter: CommandCounter, repeat: int):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        print(f"{'query':<50} {'results':>8} {'mongo ops':>10} {'avg ms':>8}")
+        for params in SERVICE_QUERIES:
+            ops = 0
+            elapsed = 0.0
+            results = 0
+            for _ in range(repeat):
+                counter.count = 0
+                server.discovery_cache.clear()
+                start = time.perf_counter()
+                response = await http.get("/api/services", params=params)
+                elapsed += time.perf_counter() - start
+                response.raise_for_status()
+                results = len(response.json())
+                ops = counter.count
+            print(f"{str(params):<50} {results:>8} {ops:>10} {elapsed / repeat * 1000:>8.1f}")
+
+
+def sample_services(count: int) -> list:
+    """A /api/services payload shaped like the seeded catalog."""
+    services = []
+    for i in range(count):
+        category = random.choice(list(CATEGORIES))
+        district = random.choice(DISTRICTS)
+        services.append({
+            "service_id": f"service-{i:06d}",
+            "provider_id": f"provider-{i // 2:06d}",
+            "name": f"{category} - Service {i}",
+            "category": category,
+            "description": DESCRIPTIONS[category],
+            "base_price": float(random.randint(800, 5000)),
+            "unit": "hour",
+            "discount": float(random.choice([0, 5, 10, 15, 20])),
+            "district": district,
+            "keywords": CATEGORIES[category],
+            "rating": round(random.uniform(3.8, 5.0), 1),
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "provider": {
+                "name": f"Provider {i // 2} - {district}",
+                "email": f"provider{i // 2}@example.com",
+                "phone": "+9104221234567",
+                "district": district,
+            },
+        })
+    return services
+
+
+def stdlib_render(content) -> bytes:
+    # What FastAPI's default JSONResponse does for a plain dict/list return value
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def bench_serialize(count: int, repeat: int):
+    services = sample_services(count)
+    print(f"{count} services, best of {repeat}")
+    for label, render in (("jsonable_encoder + json", stdlib_render), ("orjson", orjson.dumps)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = render(services)
+            timings.append(time.perf_counter() - start)
+        print(f"  {label:<24} {min(timings) * 1000:>8.2f} ms  {len(body):>9} bytes")
+
+    for level in (server.GZIP_LEVEL, 9):
+        start = time.perf_counter()
+        compressed = gzip.compress(body, compresslevel=level)
+        label = f"gzip level {level}"
+        print(f"  {label:<24} {(time.perf_counter() - start) * 1000:>8.2f} ms  {len(compressed):>9} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=["round-trips", "serialize"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--count", type=int, default=1000, help="services in the serialize payload")
+    args = parser.parse_args()
+
+    if args.benchmark == "round-trips":
+        asyncio.run(bench_round_trips(args.repeat))
+    elif args.benchmark == "serialize":
+        bench_serialize(args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
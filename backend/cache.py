@@ -0,0 +1,95 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """Bounded LRU cache with per-entry TTL and single-flight loading.
+
+    Concurrent misses for the same key share one load and are counted as coalesced. Results of loads that were in
+    flight when the cache was invalidated are returned to their callers but not stored, and callers arriving after
+    the invalidation start a fresh load instead of joining them.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Keyed by (key, generation) so only callers from the same generation share a load
+        self._in_flight: Dict[Tuple[Hashable, int], asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value. `ttl` overrides the cache TTL for this entry."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        flight = (key, self._generation)
+        task = self._in_flight.get(flight)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The load runs as its own task so cancelling whichever request started it
+            # does not cancel the others waiting on the same result
+            task = asyncio.ensure_future(self._load(flight, loader))
+            self._in_flight[flight] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, flight: Tuple[Hashable, int], loader: Callable[[], Awaitable[Any]]) -> Any:
+        key, generation = flight
+        try:
+            value = await loader()
+            if generation == self._generation:
+                self.set(key, value)
+            return value
+        finally:
+            del self._in_flight[flight]
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+        self._generation += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,45 @@
+import hashlib
+from typing import Optional
+
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Cache-Control per kind of resource
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+SHARED_CACHE_CONTROL = "public, max-age=60"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+class JSONBody:
+    """A JSON payload serialized once, with an ETag over its bytes.
+
+    The ETag is weak because GZip middleware may send the same payload compressed, and a
+    strong validator has to differ between content codings.
+    """
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content):
+        self.body = orjson.dumps(content)
+        self.etag = 'W/"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: tags match on their opaque part, W/ or not
+    if not if_none_match:
+        return False
+    tags = [_opaque(tag.strip()) for tag in if_none_match.split(",")]
+    return "*" in tags or _opaque(etag) in tags
+
+
+def conditional_response(request: Request, payload: JSONBody, cache_control: str) -> Response:
+    """200 with the body, or 304 with no body when the client already has this version."""
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before the oldest are dropped; a client that falls this far
+# behind just refetches, since every event means "refetch this booking"
+SUBSCRIBER_QUEUE_SIZE = 100
+EVENTS_COLLECTION = "events"
+COUNTERS_COLLECTION = "counters"
+# How far behind the newest event a recreated tail cursor re-reads, in sequence numbers
+RESUME_WINDOW = 1000
+EVENT_LOG_BYTES = int(os.getenv('EVENT_LOG_BYTES', str(8 * 1024 * 1024)))
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Events lost to a full queue, for subscribers that must notice gaps
+        self.dropped = 0
+
+    def deliver(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class MemoryEventBroker:
+    """Per-process pub/sub. Subscribers only see events published by the same worker.
+
+    Only suitable for a single worker; use MongoEventBroker when running several.
+    """
+
+    # Whether events reach the other workers
+    shared = False
+
+    def __init__(self):
+        self._channels: Dict[str, Set[Subscription]] = {}
+
+    async def start(self, db):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._channels.values())
+
+    def _deliver(self, channel: str, event: dict):
+        for subscription in self._channels.get(channel, ()):
+            subscription.deliver(event)
+
+    async def publish(self, channels, event: dict):
+        for channel in channels:
+            self._deliver(channel, event)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        subscription = Subscription()
+        self._channels.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._channels[channel]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._channels[channel]
+
+
+class MongoEventBroker(MemoryEventBroker):
+    """Pub/sub shared by all workers through a capped `events` collection.
+
+    Publishing takes the next number from a shared counter and inserts the event with it;
+    each worker tails the collection with one tailable cursor and fans events out to its
+    own subscribers. A live tailable cursor returns events in insertion order. The sequence
+    numbers are only needed to resume after the cursor is recreated.
+    """
+
+    shared = True
+
+    def __init__(self):
+        super().__init__()
+        self._collection = None
+        self._counters = None
+        self._task = None
+
+    async def start(self, db):
+        try:
+            await db.create_collection(EVENTS_COLLECTION, capped=True, size=EVENT_LOG_BYTES)
+        except CollectionInvalid:
+            pass
+        self._collection = db[EVENTS_COLLECTION]
+        self._counters = db[COUNTERS_COLLECTION]
+        if await self._collection.find_one({}, {"_id": 1}) is None:
+            # A tailable query that matches nothing dies at once, so give it a first document
+            await self._collection.insert_one({"seq": 0, "channels": [], "event": None})
+        # Events already in the log when the worker starts are history, not news
+        seen = set()
+        async for doc in self._collection.find({}, {"_id": 0, "seq": 1}):
+            seen.add(doc["seq"])
+        self._task = asyncio.create_task(self._tail(seen))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def publish(self, channels, event: dict):
+        counter = await self._counters.find_one_and_update(
+            {"_id": EVENTS_COLLECTION},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        await self._collection.insert_one({"seq": counter["seq"], "channels": list(channels), "event": event})
+
+    async def _tail(self, seen: Set[int]):
+        position = max(seen, default=0)
+        while True:
+            try:
+                # Publishers take their number before inserting, so a lower number can land
+                # just after a higher one. Re-read a window behind the newest event seen and
+                # skip what was already delivered; the window also keeps the query matching
+                # something, so the cursor stays open while idle.
+                cursor = self._collection.find(
+                    {"seq": {"$gt": position - RESUME_WINDOW}},
+                    {"_id": 0, "seq": 1, "channels": 1, "event": 1},
+                    cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                async for doc in cursor:
+                    seq = doc["seq"]
+                    if seq in seen:
+                        continue
+                    seen.add(seq)
+                    position = max(position, seq)
+                    if len(seen) > 2 * RESUME_WINDOW:
+                        seen = {s for s in seen if s > position - RESUME_WINDOW}
+                    for channel in doc["channels"]:
+                        self._deliver(channel, doc["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event tail failed, restarting")
+            await asyncio.sleep(1)
+
+
+def create_event_broker():
+    """Build the broker selected by EVENT_BROKER: `memory` (default) or `mongo`."""
+    backend = os.getenv('EVENT_BROKER', 'memory')
+    if backend == 'mongo':
+        return MongoEventBroker()
+    if backend == 'memory':
+        return MemoryEventBroker()
+    raise ValueError(f"Unknown EVENT_BROKER backend: {backend}")
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+
+from loaders import SERVICE_PROJECTION, USER_SUMMARY_PROJECTION, fetch_by_ids
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_FIELDS = {
+    "bookings": [
+        "booking_id", "status", "payment_status", "payment_method", "hours_days", "total_amount",
+        "service_id", "service.name", "service.category", "service.district",
+        "user_id", "user.name", "user.email", "user.phone",
+        "provider_id", "provider.name", "provider.email", "provider.phone",
+        "address_id", "notes", "created_at", "updated_at",
+    ],
+    "services": [
+        "service_id", "name", "category", "district", "base_price", "discount", "unit", "rating",
+        "provider_id", "provider.name", "provider.email", "provider.phone", "created_at",
+    ],
+}
+
+
+async def _iter_batches(cursor, size: int) -> AsyncIterator[List[dict]]:
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _join_bookings(db, bookings: List[dict]):
+    services = await fetch_by_ids(db.services, "service_id", [b['service_id'] for b in bookings], SERVICE_PROJECTION)
+    users = await fetch_by_ids(
+        db.users, "user_id",
+        [b['user_id'] for b in bookings] + [b['provider_id'] for b in bookings],
+        USER_SUMMARY_PROJECTION
+    )
+    for booking in bookings:
+        booking['service'] = services.get(booking['service_id'])
+        booking['user'] = users.get(booking['user_id'])
+        booking['provider'] = users.get(booking['provider_id'])
+
+
+async def _join_services(db, services: List[dict]):
+    providers = await fetch_by_ids(db.users, "user_id", [s['provider_id'] for s in services], USER_SUMMARY_PROJECTION)
+    for service in services:
+        service['provider'] = providers.get(service['provider_id'])
+
+
+JOINS = {
+    "bookings": _join_bookings,
+    "services": _join_services,
+}
+
+
+def _csv_value(doc: dict, field: str):
+    value = doc
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(part)
+    return "" if value is None else value
+
+
+async def stream_export(db, collection: str, fmt: str) -> AsyncIterator[str]:
+    """Stream every document of `collection` with its joins, one batch of rows at a time.
+
+    Only one batch is held in memory, so memory use does not grow with the collection.
+    """
+    cursor = db[collection].find({}, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE)
+    fields = CSV_FIELDS[collection]
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fields)
+        yield buffer.getvalue()
+
+    async for batch in _iter_batches(cursor, EXPORT_BATCH_SIZE):
+        await JOINS[collection](db, batch)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for doc in batch:
+                writer.writerow([_csv_value(doc, field) for field in fields])
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(doc, default=str) + "\n" for doc in batch)
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from typing import Optional
+
+# Upper bounds of the base_price buckets; the last bucket is open-ended
+PRICE_BUCKET_BOUNDS = [1000, 2500, 5000]
+UNSPECIFIED_DISTRICT = "Unspecified"
+
+
+def price_bucket(price: Optional[float]) -> str:
+    if price is None:
+        return "unpriced"
+    lower = 0
+    for bound in PRICE_BUCKET_BOUNDS:
+        if price < bound:
+            return f"{lower}-{bound}"
+        lower = bound
+    return f"{lower}+"
+
+
+class ServiceFacets:
+    """District x category x price bucket counts, kept current as services change."""
+
+    def __init__(self):
+        self.ready = False
+        self.clear()
+
+    def clear(self):
+        self.total = 0
+        self._counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        self._districts = defaultdict(int)
+        self._categories = defaultdict(int)
+        self._snapshot = None
+
+    async def build(self, db):
+        self.ready = False
+        self.clear()
+        async for service in db.services.find({}, {"_id": 0, "district": 1, "category": 1, "base_price": 1}):
+            self.add(service)
+        self.ready = True
+
+    def _apply(self, service: dict, delta: int):
+        district = service.get('district') or UNSPECIFIED_DISTRICT
+        category = service.get('category')
+        bucket = price_bucket(service.get('base_price'))
+
+        self._counts[district][category][bucket] += delta
+        self._districts[district] += delta
+        self._categories[category] += delta
+        self.total += delta
+        self._snapshot = None
+
+        # Drop empty cells so removed facets disappear from the response
+        if self._counts[district][category][bucket] <= 0:
+            del self._counts[district][category][bucket]
+            if not self._counts[district][category]:
+                del self._counts[district][category]
+                if not self._counts[district]:
+                    del self._counts[district]
+        if self._districts[district] <= 0:
+            del self._districts[district]
+        if self._categories[category] <= 0:
+            del self._categories[category]
+
+    def add(self, service: dict):
+        self._apply(service, 1)
+
+    def remove(self, service: dict):
+        self._apply(service, -1)
+
+    def snapshot(self) -> dict:
+        """The facet table, rebuilt only after a change."""
+        if self._snapshot is None:
+            self._snapshot = self._render()
+        return self._snapshot
+
+    def _render(self) -> dict:
+        return {
+            "total": self.total,
+            "districts": dict(self._districts),
+            "categories": dict(self._categories),
+            "counts": {
+                district: {category: dict(buckets) for category, buckets in categories.items()}
+                for district, categories in self._counts.items()
+            },
+            "price_buckets": [price_bucket(0)] + [price_bucket(bound) for bound in PRICE_BUCKET_BOUNDS],
+        }
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, Tuple
+
+import orjson
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# Lease on an in-progress claim; a claim left behind by a crashed worker is taken over after this
+IDEMPOTENCY_PENDING_SECONDS = int(os.getenv('IDEMPOTENCY_PENDING_SECONDS', '60'))
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(payload) -> str:
+    """Stable hash of a request body, so a reused key with a different body can be rejected."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class IdempotencyStore:
+    """Stores the first response for each Idempotency-Key in a TTL-indexed `idempotency_keys` collection.
+
+    A key is claimed with an upsert before the handler runs, so a duplicate arriving on another
+    worker sees the claim and gets 409 instead of repeating the write. Duplicates on the same
+    worker wait on a per-key lock and then replay the stored response.
+
+    A claim only holds a short lease until its response is stored, so a retry can take over
+    a key whose worker died mid-request instead of getting 409 for the whole TTL.
+    """
+
+    def __init__(self, db, ttl: int = IDEMPOTENCY_TTL_SECONDS, pending_ttl: int = IDEMPOTENCY_PENDING_SECONDS):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self._collection = db.idempotency_keys
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    def _acquire(self, key: str) -> asyncio.Lock:
+        lock, waiters = self._locks.get(key, (asyncio.Lock(), 0))
+        self._locks[key] = (lock, waiters + 1)
+        return lock
+
+    def _release(self, key: str):
+        lock, waiters = self._locks[key]
+        if waiters == 1:
+            del self._locks[key]
+        else:
+            self._locks[key] = (lock, waiters - 1)
+
+    def _replay(self, entry: dict, request_hash: str) -> dict:
+        if entry['request_hash'] != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if entry['status'] != 'completed':
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        return entry['response']
+
+    async def run(self, scope: str, key: str, payload, handler: Callable[[], Awaitable[dict]]) -> Tuple[dict, bool]:
+        """Run `handler` once per (scope, key). Returns the response and whether it was replayed."""
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        store_key = f"{scope}:{key}"
+        request_hash = fingerprint(payload)
+        lock = self._acquire(store_key)
+        try:
+            async with lock:
+                return await self._run_locked(store_key, request_hash, handler)
+        finally:
+            self._release(store_key)
+
+    async def _run_locked(self, store_key: str, request_hash: str, handler) -> Tuple[dict, bool]:
+        now = datetime.now(timezone.utc)
+        # The TTL monitor only runs once a minute, so expiry is checked here as well
+        entry = await self._collection.find_one(
+            {"key": store_key, "expires_at": {"$gt": now}}, {"_id": 0}
+        )
+        if entry:
+            return self._replay(entry, request_hash), True
+
+        # Claim the key; an expired entry or lapsed lease is taken over, a live one makes the upsert collide
+        try:
+            await self._collection.update_one(
+                {"key": store_key, "expires_at": {"$lte": now}},
+                {"$set": {
+                    "request_hash": request_hash,
+                    "status": "pending",
+                    "response": None,
+                    "expires_at": now + timedelta(seconds=self.pending_ttl)
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            entry = await self._collection.find_one({"key": store_key}, {"_id": 0})
+            if entry is None:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            return self._replay(entry, request_hash), True
+
+        try:
+            response = await handler()
+        except BaseException:
+            # Failed requests are not stored, so the client can retry with the same key
+            await self._collection.delete_one({"key": store_key, "status": "pending"})
+            raise
+
+        await self._collection.update_one(
+            {"key": store_key, "status": "pending", "request_hash": request_hash},
+            {"$set": {
+                "status": "completed",
+                "response": response,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+            }}
+        )
+        return response, False
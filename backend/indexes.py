@@ -0,0 +1,200 @@
+"""Declarative index manifest for the marketplace collections.
+
+Applied on server startup, or from the command line:
+
+    python indexes.py apply    # merge duplicate cart lines, then create any missing indexes
+    python indexes.py check    # report missing, unexpected and unused indexes
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, DeleteMany, IndexModel, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("phone", ASCENDING)], name="phone_unique", unique=True),
+    ],
+    "services": [
+        IndexModel([("service_id", ASCENDING)], name="service_id_unique", unique=True),
+        IndexModel([("provider_id", ASCENDING)], name="provider_id"),
+        # Leaderboard refills read one (district, category) in rating order
+        IndexModel(
+            [("district", ASCENDING), ("category", ASCENDING), ("rating", DESCENDING), ("service_id", DESCENDING)],
+            name="district_category_rating"
+        ),
+        IndexModel([("rating", DESCENDING), ("service_id", DESCENDING)], name="rating_service_id"),
+        IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+    ],
+    "bookings": [
+        IndexModel([("booking_id", ASCENDING)], name="booking_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+        IndexModel([("provider_id", ASCENDING), ("created_at", DESCENDING)], name="provider_id_created_at"),
+    ],
+    "reviews": [
+        IndexModel([("review_id", ASCENDING)], name="review_id_unique", unique=True),
+        IndexModel([("booking_id", ASCENDING)], name="booking_id_unique", unique=True),
+        IndexModel([("service_id", ASCENDING), ("created_at", DESCENDING)], name="service_id_created_at"),
+    ],
+    "cart": [
+        IndexModel([("cart_id", ASCENDING)], name="cart_id_unique", unique=True),
+        # One line per service per user; also serves the user_id lookups
+        IndexModel([("user_id", ASCENDING), ("service_id", ASCENDING)], name="user_id_service_id_unique", unique=True),
+    ],
+    "addresses": [
+        IndexModel([("address_id", ASCENDING)], name="address_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "payments": [
+        IndexModel([("payment_id", ASCENDING)], name="payment_id_unique", unique=True),
+    ],
+    "otps": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "provider_stats": [
+        IndexModel([("provider_id", ASCENDING)], name="provider_id_unique", unique=True),
+    ],
+    "idempotency_keys": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "settings": [
+        IndexModel([("type", ASCENDING)], name="type_unique", unique=True),
+    ],
+}
+
+
+async def merge_duplicate_cart_lines(db) -> int:
+    """Fold cart lines for the same (user_id, service_id) into one. Returns the lines removed.
+
+    Carts used to get a new line on every add, and those duplicates would stop the unique
+    cart index from building. The earliest line keeps its cart_id and the summed hours_days.
+    """
+    async for index in db.cart.list_indexes():
+        if index["name"] == "user_id_service_id_unique":
+            # The index is already in place, so there can be no duplicates
+            return 0
+
+    requests = []
+    removed = 0
+    pipeline = [
+        {"$sort": {"added_at": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "service_id": "$service_id"},
+            "cart_ids": {"$push": "$cart_id"},
+            "hours_days": {"$sum": "$hours_days"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    async for group in db.cart.aggregate(pipeline, allowDiskUse=True):
+        keep, *duplicates = group["cart_ids"]
+        requests.append(UpdateOne({"cart_id": keep}, {"$set": {"hours_days": group["hours_days"]}}))
+        requests.append(DeleteMany({"cart_id": {"$in": duplicates}}))
+        removed += len(duplicates)
+    if requests:
+        await db.cart.bulk_write(requests, ordered=True)
+        logger.info("Merged %d duplicate cart lines", removed)
+    return removed
+
+
+class IndexBuildError(RuntimeError):
+    """A unique index the API relies on to reject duplicates could not be built."""
+
+
+def is_unique(model: IndexModel) -> bool:
+    return bool(model.document.get("unique"))
+
+
+async def ensure_indexes(db):
+    """Create every index in the manifest. Existing indexes with the same spec are left alone.
+
+    Data that would block a unique index from building is migrated first.
+
+    A failed secondary index is logged and skipped. A missing unique index raises
+    IndexBuildError: registration and the cart merge depend on them instead of checking
+    first, so serving without one would silently let duplicates in.
+    """
+    await merge_duplicate_cart_lines(db)
+    missing_unique = []
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except Exception:
+            logger.exception("Failed to create indexes on %s", collection)
+            existing = {index["name"] async for index in db[collection].list_indexes()}
+            missing_unique += [
+                f"{collection}.{model.document['name']}"
+                for model in models
+                if is_unique(model) and model.document["name"] not in existing
+            ]
+    if missing_unique:
+        raise IndexBuildError(f"Unique indexes could not be built: {', '.join(missing_unique)}")
+
+
+async def check_indexes(db) -> dict:
+    """Compare the manifest against the database.
+
+    Returns a report per collection with indexes that are missing from the database,
+    present but not in the manifest, and never used since the server last started.
+    """
+    report = {}
+    for collection, models in INDEXES.items():
+        expected = {model.document["name"] for model in models}
+        existing = set()
+        async for index in db[collection].list_indexes():
+            existing.add(index["name"])
+        existing.discard("_id_")
+
+        unused = []
+        if existing:
+            async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    unused.append(stats["name"])
+
+        report[collection] = {
+            "missing": sorted(expected - existing),
+            "unexpected": sorted(existing - expected),
+            "unused": sorted(unused),
+        }
+    return report
+
+
+async def main(command: str):
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    if command == "apply":
+        try:
+            await ensure_indexes(db)
+        except IndexBuildError as e:
+            print(f"❌ {e}")
+            client.close()
+            sys.exit(1)
+        print("✅ Indexes applied")
+    else:
+        report = await check_indexes(db)
+        for collection, result in report.items():
+            print(f"{collection}:")
+            for kind in ("missing", "unexpected", "unused"):
+                if result[kind]:
+                    print(f"  {kind}: {', '.join(result[kind])}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("apply", "check"):
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1]))
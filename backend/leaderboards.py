@@ -0,0 +1,240 @@
+import heapq
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '500'))
+# Characters that make a district/category filter a real regex rather than a plain substring
+REGEX_METACHARACTERS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+BucketKey = Tuple[Optional[str], Optional[str]]
+
+
+def rank(service: dict) -> tuple:
+    """Sort key matching the Mongo sort (rating desc, service_id desc) with unrated services last."""
+    rating = service.get('rating')
+    return (rating is not None, rating or 0, service['service_id'])
+
+
+def cursor_rank(rating: Optional[float], service_id: str) -> tuple:
+    return (rating is not None, rating or 0, service_id)
+
+
+def bucket_key(service: dict) -> BucketKey:
+    return (service.get('district') or None, service.get('category') or None)
+
+
+def _matches(value: Optional[str], pattern: Optional[str]) -> bool:
+    # Same result as {"$regex": pattern, "$options": "i"} for patterns without metacharacters
+    if not pattern:
+        return True
+    return value is not None and pattern.lower() in value.lower()
+
+
+class Bucket:
+    """The best services of one (district, category), in rank order.
+
+    `complete` means the bucket holds every service in its (district, category). When it
+    does not, every service missing from it ranks below its last entry, which is what lets
+    a query trust the bucket down to that entry.
+    """
+
+    __slots__ = ("services", "complete", "version")
+
+    def __init__(self, services: List[dict], complete: bool):
+        self.services = services
+        self.complete = complete
+        self.version = 0
+
+    def floor(self) -> Optional[tuple]:
+        """Rank below which this bucket may be missing services, or None if it holds them all."""
+        if self.complete:
+            return None
+        # An emptied truncated bucket vouches for nothing
+        return rank(self.services[-1]) if self.services else (True, math.inf, "")
+
+
+class ServiceLeaderboards:
+    """Top-K services per (district, category) by rating, kept current as services change.
+
+    Answers the default discovery listing (no keyword) from memory. A query walks the merged
+    leaderboards of every matching bucket and is only answered if the page it needs lies
+    above the point where a truncated bucket could be hiding a service; otherwise the caller
+    falls back to Mongo.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self.ready = False
+        self._buckets: Dict[BucketKey, Bucket] = {}
+        self._where: Dict[str, BucketKey] = {}
+        self.refills = 0
+
+    def __len__(self):
+        return len(self._where)
+
+    async def build(self, db):
+        self.ready = False
+        # Stream the collection through a min-heap per bucket so at most `size` documents
+        # per (district, category) are held at once; ranks are unique, so entries never
+        # compare their documents
+        heaps: Dict[BucketKey, List[Tuple[tuple, dict]]] = {}
+        counts: Dict[BucketKey, int] = {}
+        async for service in db.services.find({}, {"_id": 0}):
+            key = bucket_key(service)
+            heap = heaps.setdefault(key, [])
+            counts[key] = counts.get(key, 0) + 1
+            entry = (rank(service), service)
+            if len(heap) < self.size:
+                heapq.heappush(heap, entry)
+            elif heap and entry[0] > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+        self._buckets.clear()
+        self._where.clear()
+        for key, heap in heaps.items():
+            services = [service for _, service in sorted(heap, key=lambda entry: entry[0], reverse=True)]
+            self._set_bucket(key, services, complete=counts[key] <= self.size)
+        self.ready = True
+
+    def _set_bucket(self, key: BucketKey, services: List[dict], complete: bool):
+        old = self._buckets.get(key)
+        if old:
+            for service in old.services:
+                self._where.pop(service['service_id'], None)
+        bucket = Bucket(services, complete)
+        if old:
+            bucket.version = old.version + 1
+        self._buckets[key] = bucket
+        for service in services:
+            self._where[service['service_id']] = key
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "services": len(self._where),
+            "truncated_buckets": sum(1 for bucket in self._buckets.values() if not bucket.complete),
+            "refills": self.refills,
+        }
+
+    def get(self, service_id: str) -> Optional[dict]:
+        key = self._where.get(service_id)
+        if key is None:
+            return None
+        return next(s for s in self._buckets[key].services if s['service_id'] == service_id)
+
+    # ----- maintenance -----
+
+    def _remove(self, service_id: str) -> Optional[BucketKey]:
+        key = self._where.pop(service_id, None)
+        if key is None:
+            return None
+        bucket = self._buckets[key]
+        bucket.services = [s for s in bucket.services if s['service_id'] != service_id]
+        bucket.version += 1
+        return key
+
+    def _insert(self, service: dict):
+        key = bucket_key(service)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # First service seen in this (district, category)
+            self._set_bucket(key, [service], complete=True)
+            return
+        floor = bucket.floor()
+        if floor is not None and rank(service) < floor:
+            # Ranks below a truncated bucket's last entry, where services are already missing
+            return
+        bucket.services.append(service)
+        bucket.services.sort(key=rank, reverse=True)
+        self._where[service['service_id']] = key
+        if len(bucket.services) > self.size:
+            dropped = bucket.services.pop()
+            self._where.pop(dropped['service_id'], None)
+            bucket.complete = False
+        bucket.version += 1
+
+    async def upsert(self, db, service: dict):
+        """Place a created or changed service (full document) in its leaderboard."""
+        old_key = self._remove(service['service_id'])
+        self._insert({k: v for k, v in service.items() if k != "_id"})
+        if old_key is not None:
+            await self._maybe_refill(db, old_key)
+
+    async def remove(self, db, service_id: str):
+        key = self._remove(service_id)
+        if key is not None:
+            await self._maybe_refill(db, key)
+
+    def patch(self, service_id: str, fields: dict):
+        """Update fields that do not affect ranking, such as location."""
+        service = self.get(service_id)
+        if service:
+            service.update(fields)
+
+    async def _maybe_refill(self, db, key: BucketKey):
+        # A truncated bucket that shrank still answers correctly, just for fewer ranks;
+        # top it back up from Mongo once it has lost half its entries
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.complete or len(bucket.services) >= self.size // 2:
+            return
+        version = bucket.version
+        district, category = key
+        query = {
+            "district": district if district is not None else {"$in": [None, ""]},
+            "category": category if category is not None else {"$in": [None, ""]}
+        }
+        services = await db.services.find(query, {"_id": 0}).sort(
+            [("rating", -1), ("service_id", -1)]
+        ).to_list(self.size + 1)
+        if self._buckets.get(key) is not bucket or bucket.version != version:
+            # Changed while the query ran; the next removal will try again
+            return
+        self._set_bucket(key, services[:self.size], complete=len(services) <= self.size)
+        self.refills += 1
+
+    # ----- queries -----
+
+    @staticmethod
+    def servable(district: Optional[str], category: Optional[str]) -> bool:
+        return not any(value and REGEX_METACHARACTERS.search(value) for value in (district, category))
+
+    def query(
+        self,
+        district: Optional[str],
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        after: Optional[tuple],
+        count: int
+    ) -> Optional[List[dict]]:
+        """Up to `count` services ranked after `after`, or None if the leaderboards cannot be sure."""
+        if not self.ready or not self.servable(district, category):
+            return None
+
+        buckets = [
+            bucket for (bucket_district, bucket_category), bucket in self._buckets.items()
+            if _matches(bucket_district, district) and _matches(bucket_category, category)
+        ]
+        # Everything ranked at or above the highest truncation point is known exactly
+        floors = [floor for floor in (bucket.floor() for bucket in buckets) if floor is not None]
+        horizon = max(floors) if floors else None
+
+        results = []
+        for service in heapq.merge(*(bucket.services for bucket in buckets), key=rank, reverse=True):
+            service_rank = rank(service)
+            if horizon is not None and service_rank < horizon:
+                return None
+            if after is not None and service_rank >= after:
+                continue
+            price = service.get('base_price')
+            if min_price is not None and (price is None or price < min_price):
+                continue
+            if max_price is not None and (price is None or price > max_price):
+                continue
+            results.append(dict(service))
+            if len(results) == count:
+                return results
+        # Ran out of services: exact only if no truncated bucket could hold more
+        return results if horizon is None else None
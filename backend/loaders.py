@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# Public profile fields joined onto bookings
+USER_SUMMARY_PROJECTION = {"_id": 0, "name": 1, "email": 1, "phone": 1}
+SERVICE_PROJECTION = {"_id": 0}
+
+
+async def fetch_by_ids(collection, field: str, ids: List[str], projection: dict) -> Dict[str, dict]:
+    """Fetch documents whose `field` is in `ids` with a single $in query, keyed by `field`."""
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    # Inclusion projections may omit the key field, so request it and strip it again
+    inclusive = any(v == 1 for k, v in projection.items() if k != "_id")
+    strip_field = inclusive and projection.get(field) != 1
+    if inclusive:
+        projection = {**projection, field: 1}
+    docs = await collection.find({field: {"$in": ids}}, projection).to_list(len(ids))
+    return {(doc.pop(field) if strip_field else doc[field]): doc for doc in docs}
+
+
+class BatchLoader:
+    """Collects keys requested in the same event loop tick and resolves them with one batch call.
+
+    Keys are deduplicated and cached for the lifetime of the loader, so a loader should be
+    scoped to a single request.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]):
+        self._batch_fn = batch_fn
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+
+    def load(self, key: Hashable) -> Awaitable[Optional[Any]]:
+        if key in self._cache:
+            return self._cache[key]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def prime(self, key: Hashable, value: Any):
+        """Seed the cache with an already fetched value."""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        try:
+            results = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                self._cache.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self._cache[key].set_result(results.get(key))
+
+
+class RequestLoaders:
+    """Request-scoped loaders for the documents joined onto carts and bookings."""
+
+    def __init__(self, db):
+        self.services = BatchLoader(
+            lambda ids: fetch_by_ids(db.services, "service_id", ids, SERVICE_PROJECTION)
+        )
+        self.users = BatchLoader(
+            lambda ids: fetch_by_ids(db.users, "user_id", ids, USER_SUMMARY_PROJECTION)
+        )
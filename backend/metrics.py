@@ -0,0 +1,245 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+MONGO_COMMAND_BUCKETS = [0, 1, 2, 3, 5, 8, 13, 21, 50, 100]
+
+# Mongo commands issued while handling the current request
+_request_commands: contextvars.ContextVar = contextvars.ContextVar("request_commands", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: List[float]):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._counts: Dict[tuple, List[int]] = {}
+        self._sums: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            counts = self._counts.setdefault(labels, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[labels] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, counts in sorted(self._counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {self._sums[labels]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {counts[-1]}")
+        return lines
+
+
+class RequestCommands:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        # Motor runs commands on executor threads, so requests can count concurrently
+        with self._lock:
+            self.count += 1
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS)
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being handled.", ("method", "route"))
+REQUEST_MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands", "Mongo commands issued per HTTP request.", ("method", "route"), MONGO_COMMAND_BUCKETS
+)
+MONGO_COMMANDS = Counter("mongo_commands_total", "Mongo commands by command name.", ("command",))
+MONGO_FAILURES = Counter("mongo_command_failures_total", "Failed Mongo commands by command name.", ("command",))
+
+# Extra gauges sampled when /metrics is scraped: name -> (help, callback returning {labels: value})
+_collectors: Dict[str, Tuple[str, Tuple[str, ...], Callable[[], Dict[tuple, float]]]] = {}
+
+
+def register_collector(name: str, help: str, labels: Tuple[str, ...], collect: Callable[[], Dict[tuple, float]]):
+    _collectors[name] = (help, labels, collect)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts every Mongo command, globally and against the request that issued it."""
+
+    def started(self, event):
+        MONGO_COMMANDS.inc(event.command_name)
+        commands = _request_commands.get()
+        if commands is not None:
+            commands.add()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        MONGO_FAILURES.inc(event.command_name)
+
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool occupancy across all servers the client talks to.
+
+    Utilisation is checked-out connections over maxPoolSize, which is a per-server limit,
+    so it is exact for a standalone or for primary-only traffic.
+    """
+
+    def __init__(self, max_pool_size: int):
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+
+    def _add(self, field: str, amount: int):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"open": self.open, "checked_out": self.checked_out, "waiting": self.waiting}
+        stats["max_pool_size"] = self.max_pool_size
+        stats["utilisation"] = round(stats["checked_out"] / self.max_pool_size, 3) if self.max_pool_size else 0.0
+        return stats
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("open", 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def connection_check_out_started(self, event):
+        self._add("waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        self._add("waiting", -1)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, in-flight requests and Mongo commands per route.
+
+    Routes are labelled by their path template, so /api/services/{service_id} is one series.
+    Each response also carries an X-Mongo-Commands header with the request's command count.
+    """
+
+    def __init__(self, app, router=None):
+        self.app = app
+        self.router = router
+
+    def _route_label(self, scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_label(scope) if self.router else scope["path"]
+        commands = RequestCommands()
+        token = _request_commands.set(commands)
+        status = [500]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-mongo-commands", str(commands.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        IN_PROGRESS.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            IN_PROGRESS.dec(method, route)
+            LATENCY.observe(time.perf_counter() - start, method, route)
+            REQUESTS.inc(method, route, str(status[0]))
+            REQUEST_MONGO_COMMANDS.observe(commands.count, method, route)
+            _request_commands.reset(token)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in (REQUESTS, LATENCY, IN_PROGRESS, REQUEST_MONGO_COMMANDS, MONGO_COMMANDS, MONGO_FAILURES):
+        lines.extend(metric.render())
+    for name, (help, labels, collect) in sorted(_collectors.items()):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        for label_values, value in sorted(collect().items()):
+            lines.append(f"{name}{_format_labels(labels, label_values)} {value}")
+    return "\n".join(lines) + "\n"
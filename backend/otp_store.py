@@ -0,0 +1,81 @@
+import heapq
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '300'))
+
+
+class MemoryOTPStore:
+    """Per-process OTP store. Expired entries are swept on every access.
+
+    Only suitable for a single worker; use MongoOTPStore when running several.
+    """
+
+    def __init__(self, ttl: int = OTP_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _sweep(self, now: float):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            # Skip heap entries superseded by a newer OTP for the same key
+            if entry and entry[0] == expires_at:
+                del self._entries[key]
+
+    async def put(self, key: str, otp: str):
+        now = time.monotonic()
+        self._sweep(now)
+        expires_at = now + self.ttl
+        self._entries[key] = (expires_at, otp)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def get(self, key: str) -> Optional[str]:
+        self._sweep(time.monotonic())
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class MongoOTPStore:
+    """OTP store shared by all workers, backed by a TTL-indexed `otps` collection."""
+
+    def __init__(self, db, ttl: int = OTP_TTL_SECONDS):
+        self.ttl = ttl
+        self._collection = db.otps
+
+    async def put(self, key: str, otp: str):
+        await self._collection.update_one(
+            {"key": key},
+            {"$set": {"otp": otp, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)}},
+            upsert=True
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        # The TTL monitor only runs once a minute, so expiry is checked here as well
+        entry = await self._collection.find_one(
+            {"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"_id": 0, "otp": 1}
+        )
+        return entry['otp'] if entry else None
+
+    async def delete(self, key: str):
+        await self._collection.delete_one({"key": key})
+
+
+def create_otp_store(db):
+    """Build the store selected by OTP_STORE: `memory` (default) or `mongo`."""
+    backend = os.getenv('OTP_STORE', 'memory')
+    if backend == 'mongo':
+        return MongoOTPStore(db)
+    if backend == 'memory':
+        return MemoryOTPStore()
+    raise ValueError(f"Unknown OTP_STORE backend: {backend}")
@@ -0,0 +1,161 @@
+"""Per-provider booking counters behind GET /api/providers/stats.
+
+The server keeps them current as bookings change. Recompute them from the bookings
+collection after a bulk import or if they drift:
+
+    python provider_stats.py rebuild
+"""
+import asyncio
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+
+BOOKING_STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+# Bookings whose amount is still to be earned; completed bookings count as earned revenue
+OPEN_STATUSES = {'pending', 'in_progress'}
+
+
+def period(timestamp: Optional[str]) -> str:
+    """The month a booking completed in, from its ISO timestamp."""
+    return (timestamp or datetime.now(timezone.utc).isoformat())[:7]
+
+
+def completed_at(booking: dict) -> Optional[str]:
+    # Bookings completed before completed_at was recorded fall back to their last update
+    return booking.get('completed_at') or booking.get('updated_at') or booking.get('created_at')
+
+
+def _contribution(status: str, amount: float, completed_period: Optional[str]) -> dict:
+    inc = {f"bookings.{status}": 1}
+    if status in OPEN_STATUSES:
+        inc["revenue.pending"] = amount
+    elif status == 'completed':
+        inc["revenue.total"] = amount
+        inc[f"completed_by_month.{completed_period}"] = 1
+    return inc
+
+
+def empty_stats(provider_id: str) -> dict:
+    return {
+        "provider_id": provider_id,
+        "bookings": {status: 0 for status in BOOKING_STATUSES},
+        "revenue": {"total": 0.0, "pending": 0.0},
+        "completed_by_month": {},
+    }
+
+
+class ProviderStats:
+    """Counters in the `provider_stats` collection, one document per provider, changed with $inc."""
+
+    def __init__(self, db):
+        self._collection = db.provider_stats
+        self._bookings = db.bookings
+
+    async def _inc(self, provider_id: str, inc: dict):
+        inc = {field: value for field, value in inc.items() if value}
+        if not inc:
+            return
+        await self._collection.update_one(
+            {"provider_id": provider_id},
+            {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+
+    async def booking_created(self, booking: dict):
+        await self._inc(
+            booking['provider_id'],
+            _contribution(booking['status'], booking['total_amount'], period(completed_at(booking)))
+        )
+
+    async def booking_changed(self, before: dict, after: dict):
+        """Move a booking's contribution from its old status to its new one.
+
+        `before` must be the document as it was replaced, so concurrent updates each see a
+        distinct old status and the counters stay consistent.
+        """
+        if before['status'] == after['status']:
+            return
+        amount = before.get('total_amount', 0)
+        inc = defaultdict(int)
+        for field, value in _contribution(after['status'], amount, period(after.get('completed_at'))).items():
+            inc[field] += value
+        for field, value in _contribution(before['status'], amount, period(completed_at(before))).items():
+            inc[field] -= value
+        await self._inc(before['provider_id'], inc)
+
+    async def get(self, provider_id: str) -> dict:
+        stats = empty_stats(provider_id)
+        stored = await self._collection.find_one({"provider_id": provider_id}, {"_id": 0})
+        if stored:
+            stats["bookings"].update(stored.get("bookings", {}))
+            stats["revenue"].update(stored.get("revenue", {}))
+            stats["completed_by_month"] = {
+                month: count for month, count in sorted(stored.get("completed_by_month", {}).items()) if count
+            }
+            stats["updated_at"] = stored.get("updated_at")
+        stats["completed_this_month"] = stats["completed_by_month"].get(period(None), 0)
+        return stats
+
+    async def rebuild(self) -> int:
+        """Recompute every provider's counters from bookings. Returns the number of providers."""
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "provider_id": "$provider_id",
+                    "status": "$status",
+                    "month": {"$cond": [
+                        {"$eq": ["$status", "completed"]},
+                        {"$substr": [{"$ifNull": ["$completed_at", {"$ifNull": ["$updated_at", "$created_at"]}]}, 0, 7]},
+                        None
+                    ]}
+                },
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$total_amount"}
+            }}
+        ]
+        stats = {}
+        async for group in self._bookings.aggregate(pipeline):
+            key = group["_id"]
+            provider = stats.setdefault(key["provider_id"], empty_stats(key["provider_id"]))
+            status = key["status"]
+            provider["bookings"][status] = provider["bookings"].get(status, 0) + group["count"]
+            if status in OPEN_STATUSES:
+                provider["revenue"]["pending"] += group["amount"]
+            elif status == 'completed':
+                provider["revenue"]["total"] += group["amount"]
+                provider["completed_by_month"][key["month"]] = group["count"]
+
+        now = datetime.now(timezone.utc).isoformat()
+        requests = [
+            ReplaceOne({"provider_id": provider_id}, {**doc, "updated_at": now}, upsert=True)
+            for provider_id, doc in stats.items()
+        ]
+        if requests:
+            await self._collection.bulk_write(requests, ordered=False)
+        await self._collection.delete_many({"provider_id": {"$nin": list(stats)}})
+        return len(stats)
+
+
+async def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    count = await ProviderStats(db).rebuild()
+    print(f"✅ Rebuilt stats for {count} providers")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] != "rebuild":
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main())
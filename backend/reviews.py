@@ -0,0 +1,26 @@
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+
+async def add_rating(services, service_id: str, stars: int) -> Optional[dict]:
+    """Fold one review into a service's running rating. Returns the service's rating fields.
+
+    rating_sum and rating_count move together in one $inc. The derived average is written
+    only while rating_count still matches, so when reviews race the one that landed last
+    publishes the average and an earlier one can never overwrite it with a stale value.
+    """
+    counters = await services.find_one_and_update(
+        {"service_id": service_id},
+        {"$inc": {"rating_sum": stars, "rating_count": 1}},
+        projection={"rating_sum": 1, "rating_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if counters is None:
+        return None
+    rating = round(counters['rating_sum'] / counters['rating_count'], 2)
+    await services.update_one(
+        {"service_id": service_id, "rating_count": counters['rating_count']},
+        {"$set": {"rating": rating}}
+    )
+    return {"rating": rating, "rating_count": counters['rating_count']}
@@ -0,0 +1,166 @@
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Fields indexed for keyword search, with their term frequency weights
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 2.0,
+    "keywords": 2.0,
+    "description": 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _field_text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+class ServiceSearchIndex:
+    """In-memory inverted index over the services collection with BM25 ranking.
+
+    Every query term matches indexed terms it is a prefix of, and all query terms must
+    match. The index holds a copy of each service document, so searches are answered
+    without touching Mongo.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._docs: Dict[str, dict] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._vocabulary: List[str] = []
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self._docs)
+
+    async def build(self, db):
+        self.clear()
+        async for service in db.services.find({}, {"_id": 0}):
+            self.add(service)
+        self.ready = True
+
+    def clear(self):
+        self.ready = False
+        self._docs.clear()
+        self._doc_lengths.clear()
+        self._postings.clear()
+        self._vocabulary = []
+        self._total_length = 0.0
+
+    def add(self, service: dict):
+        """Index a service, replacing any previous version with the same service_id."""
+        service_id = service['service_id']
+        self.remove(service_id)
+
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(_field_text(service.get(field))):
+                frequencies[term] += weight
+
+        for term, frequency in frequencies.items():
+            postings = self._postings[term]
+            if not postings:
+                bisect.insort(self._vocabulary, term)
+            postings[service_id] = frequency
+
+        length = sum(frequencies.values())
+        self._docs[service_id] = {k: v for k, v in service.items() if k != "_id"}
+        self._doc_lengths[service_id] = length
+        self._total_length += length
+
+    def remove(self, service_id: str):
+        service = self._docs.pop(service_id, None)
+        if service is None:
+            return
+        self._total_length -= self._doc_lengths.pop(service_id)
+
+        for field in FIELD_WEIGHTS:
+            for term in set(tokenize(_field_text(service.get(field)))):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(service_id, None)
+                if not postings:
+                    del self._postings[term]
+                    index = bisect.bisect_left(self._vocabulary, term)
+                    if index < len(self._vocabulary) and self._vocabulary[index] == term:
+                        del self._vocabulary[index]
+
+    def get(self, service_id: str) -> Optional[dict]:
+        service = self._docs.get(service_id)
+        return dict(service) if service else None
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _matches_filters(self, service, district, category, min_price, max_price) -> bool:
+        if district and district.lower() not in str(service.get('district', '')).lower():
+            return False
+        if category and category.lower() not in str(service.get('category', '')).lower():
+            return False
+        price = service.get('base_price')
+        if min_price is not None and (price is None or price < min_price):
+            return False
+        if max_price is not None and (price is None or price > max_price):
+            return False
+        return True
+
+    def search(
+        self,
+        keyword: str,
+        district: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """Return copies of the matching services, best match first."""
+        terms = tokenize(keyword)
+        if not terms or not self._docs:
+            return []
+
+        doc_count = len(self._docs)
+        avg_length = self._total_length / doc_count
+        scores: Optional[Dict[str, float]] = None
+
+        for query_term in terms:
+            term_scores: Dict[str, float] = defaultdict(float)
+            for term in self._expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for service_id, frequency in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[service_id] / avg_length)
+                    term_scores[service_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {sid: score + term_scores[sid] for sid, score in scores.items() if sid in term_scores}
+            if not scores:
+                return []
+
+        matches = [
+            (score, sid) for sid, score in scores.items()
+            if self._matches_filters(self._docs[sid], district, category, min_price, max_price)
+        ]
+        matches.sort(key=lambda match: (match[0], self._docs[match[1]].get('rating') or 0), reverse=True)
+        return [dict(self._docs[sid]) for _, sid in matches[:limit]]
@@ -1,10 +1,28 @@
+"""Seed the marketplace with deterministic sample data.
+
+    python seed_data.py                         # the default catalog (~460 providers)
+    python seed_data.py --scale 200 --seed 7    # load-test volumes, same data for the same seed
+
+Every document is derived from (seed, kind, index), so chunks are generated in parallel
+worker processes and written with batched insert_many calls.
+"""
+import argparse
 import asyncio
-import random
-from motor.motor_asyncio import AsyncIOMotorClient
+import math
 import os
-from datetime import datetime, timezone
+import random
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
 import bcrypt
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import INDEXES, ensure_indexes, is_unique
+from provider_stats import ProviderStats
 
 # TamilNadu Districts
 DISTRICTS = [
@@ -16,6 +34,23 @@ DISTRICTS = [
     "Tiruppur", "Tiruvallur", "Tiruvannamalai", "Tiruvarur", "Vellore", "Viluppuram", "Virudhunagar"
 ]
 
+# Approximate district headquarters (latitude, longitude)
+DISTRICT_COORDINATES = {
+    "Ariyalur": (11.14, 79.08), "Chengalpattu": (12.69, 79.98), "Chennai": (13.08, 80.27),
+    "Coimbatore": (11.02, 76.96), "Cuddalore": (11.75, 79.75), "Dharmapuri": (12.13, 78.16),
+    "Dindigul": (10.36, 77.98), "Erode": (11.34, 77.72), "Kallakurichi": (11.74, 78.96),
+    "Kanchipuram": (12.83, 79.70), "Karur": (10.96, 78.08), "Krishnagiri": (12.52, 78.21),
+    "Madurai": (9.93, 78.12), "Mayiladuthurai": (11.10, 79.65), "Nagapattinam": (10.77, 79.84),
+    "Namakkal": (11.22, 78.17), "Nilgiris": (11.41, 76.70), "Perambalur": (11.23, 78.88),
+    "Pudukkottai": (10.38, 78.82), "Ramanathapuram": (9.37, 78.83), "Ranipet": (12.93, 79.33),
+    "Salem": (11.66, 78.15), "Sivaganga": (9.85, 78.48), "Tenkasi": (8.96, 77.30),
+    "Thanjavur": (10.79, 79.14), "Theni": (10.01, 77.48), "Thoothukudi": (8.76, 78.13),
+    "Tiruchirappalli": (10.80, 78.69), "Tirunelveli": (8.71, 77.76), "Tirupathur": (12.50, 78.57),
+    "Tiruppur": (11.11, 77.34), "Tiruvallur": (13.14, 79.91), "Tiruvannamalai": (12.23, 79.07),
+    "Tiruvarur": (10.77, 79.64), "Vellore": (12.92, 79.13), "Viluppuram": (11.94, 79.49),
+    "Virudhunagar": (9.58, 77.96)
+}
+
 # Service Categories with keywords
 CATEGORIES = {
     "Earth Movers": ["excavator", "jcb", "bulldozer", "earthmoving", "digging"],
@@ -43,10 +78,241 @@ DESCRIPTIONS = {
     "Power Tools": "Wide range of construction equipment and power tools for rent. Daily and monthly rental options available."
 }
 
+BOOKING_STATUSES = ["pending", "in_progress", "completed", "cancelled"]
+
+# Document counts at --scale 1, close to the original per-district catalog
+BASE_COUNTS = {
+    "providers": 460,
+    "services": 700,
+    "customers": 200,
+    "addresses": 250,
+    "carts": 300,
+    "bookings": 1000,
+}
+
+# Collection each kind is written to, in load order
+COLLECTIONS = {
+    "providers": "users",
+    "customers": "users",
+    "services": "services",
+    "addresses": "addresses",
+    "carts": "cart",
+    "bookings": "bookings",
+}
+
+SEED_NAMESPACE = uuid.UUID("6f1d3c1e-6a4e-4f0b-9a57-3b0f4a6c2d10")
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-async def seed_database():
+def district_location(district: str, rng: random.Random = random) -> dict:
+    # Scatter providers around the district headquarters
+    latitude, longitude = DISTRICT_COORDINATES[district]
+    return {
+        "type": "Point",
+        "coordinates": [
+            round(longitude + rng.uniform(-0.15, 0.15), 5),
+            round(latitude + rng.uniform(-0.15, 0.15), 5)
+        ]
+    }
+
+def seeded_id(ctx: dict, kind: str, index: int) -> str:
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{ctx['seed']}:{kind}:{index}"))
+
+def seeded_random(ctx: dict, kind: str, index: int) -> random.Random:
+    return random.Random(f"{ctx['seed']}:{kind}:{index}")
+
+# ============= Document Generators =============
+# Each generator depends only on ctx and the index, so any range can be built in any process.
+
+def make_provider(ctx: dict, i: int) -> dict:
+    rng = seeded_random(ctx, "provider", i)
+    district = DISTRICTS[i % len(DISTRICTS)]
+    category = list(CATEGORIES)[(i // len(DISTRICTS)) % len(CATEGORIES)]
+    company_name = rng.choice(COMPANY_NAMES[category])
+    return {
+        "user_id": seeded_id(ctx, "provider", i),
+        "name": f"{company_name} - {district}",
+        "email": f"{company_name.lower().replace(' ', '')}_{district.lower()}_{i}@example.com",
+        "phone": f"+919{i:09d}",
+        "password": ctx['provider_password'],
+        "pin": ctx['pin'],
+        "role": "provider",
+        "verified": True,
+        "created_at": ctx['created_at'],
+        "district": district,
+        "category": category,
+        "location": district_location(district, rng),
+        "seeded": True
+    }
+
+def make_service(ctx: dict, i: int) -> dict:
+    rng = seeded_random(ctx, "service", i)
+    # The first pass gives every provider a service, the rest are spread at random
+    provider_index = i if i < ctx['counts']['providers'] else rng.randrange(ctx['counts']['providers'])
+    provider = make_provider(ctx, provider_index)
+    category = provider['category']
+    keywords = CATEGORIES[category]
+    keyword = rng.choice(keywords)
+    # Running totals as the review subsystem keeps them, so the average matches the counters
+    rating_count = rng.randint(1, 60)
+    rating_sum = round(rng.uniform(3.8, 5.0) * rating_count)
+    return {
+        "service_id": seeded_id(ctx, "service", i),
+        "provider_id": provider['user_id'],
+        "name": f"{category} - {keyword.title()} Service",
+        "category": category,
+        "description": DESCRIPTIONS[category],
+        "base_price": float(rng.randint(800, 5000)),
+        "unit": "hour" if category in ["Earth Movers", "Power Tools"] else "service",
+        "discount": float(rng.choice([0, 5, 10, 15, 20])),
+        "district": provider['district'],
+        "keywords": keywords,
+        "rating": round(rating_sum / rating_count, 2),
+        "rating_count": rating_count,
+        "rating_sum": rating_sum,
+        "location": provider['location'],
+        "created_at": ctx['created_at'],
+        "seeded": True
+    }
+
+def make_customer(ctx: dict, i: int) -> dict:
+    return {
+        "user_id": seeded_id(ctx, "customer", i),
+        "name": f"Customer {i}",
+        "email": f"customer{i}@example.com",
+        "phone": f"+918{i:09d}",
+        "password": ctx['customer_password'],
+        "pin": ctx['pin'],
+        "role": "user",
+        "verified": True,
+        "created_at": ctx['created_at'],
+        "seeded": True
+    }
+
+def make_address(ctx: dict, i: int) -> dict:
+    rng = seeded_random(ctx, "address", i)
+    district = rng.choice(DISTRICTS)
+    location = district_location(district, rng)
+    return {
+        "address_id": seeded_id(ctx, "address", i),
+        "user_id": seeded_id(ctx, "customer", i % ctx['counts']['customers']),
+        "user_name": f"Customer {i % ctx['counts']['customers']}",
+        "street_name": f"{rng.randint(1, 200)} Main Road",
+        "city": district,
+        "district": district,
+        "pincode": f"6{rng.randint(0, 99999):05d}",
+        "landmark": None,
+        "latitude": location['coordinates'][1],
+        "longitude": location['coordinates'][0],
+        "created_at": ctx['created_at'],
+        "seeded": True
+    }
+
+def cart_service_index(ctx: dict, customer: int, slot: int) -> int:
+    # Each customer walks their own permutation of the services (a random offset and a step
+    # coprime to the service count), so a customer's slots never repeat a service
+    services = ctx['counts']['services']
+    rng = seeded_random(ctx, "cart-customer", customer)
+    offset = rng.randrange(services)
+    step = rng.randrange(1, services) if services > 1 else 1
+    while math.gcd(step, services) != 1:
+        step += 1
+    return (offset + slot * step) % services
+
+def make_cart(ctx: dict, i: int) -> dict:
+    rng = seeded_random(ctx, "cart", i)
+    # (user_id, service_id) is unique in the cart, so hand out distinct pairs: cart i is
+    # slot i // customers of customer i % customers
+    customer = i % ctx['counts']['customers']
+    return {
+        "cart_id": seeded_id(ctx, "cart", i),
+        "user_id": seeded_id(ctx, "customer", customer),
+        "service_id": seeded_id(ctx, "service", cart_service_index(ctx, customer, i // ctx['counts']['customers'])),
+        "hours_days": float(rng.randint(1, 8)),
+        "added_at": ctx['created_at'],
+        "seeded": True
+    }
+
+def make_booking(ctx: dict, i: int) -> dict:
+    rng = seeded_random(ctx, "booking", i)
+    service = make_service(ctx, rng.randrange(ctx['counts']['services']))
+    hours_days = float(rng.randint(1, 8))
+    status = rng.choice(BOOKING_STATUSES)
+    booking = {
+        "booking_id": seeded_id(ctx, "booking", i),
+        "user_id": seeded_id(ctx, "customer", rng.randrange(ctx['counts']['customers'])),
+        "service_id": service['service_id'],
+        "provider_id": service['provider_id'],
+        "address_id": seeded_id(ctx, "address", rng.randrange(max(ctx['counts']['addresses'], 1))),
+        "hours_days": hours_days,
+        "total_amount": service['base_price'] * (1 - service['discount'] / 100) * hours_days,
+        "payment_method": rng.choice(["upi", "cash", "advance_upi"]),
+        "status": status,
+        "notes": None,
+        "created_at": ctx['created_at'],
+        "seeded": True
+    }
+    if status == "completed":
+        booking["payment_status"] = "paid"
+    return booking
+
+GENERATORS = {
+    "providers": make_provider,
+    "customers": make_customer,
+    "services": make_service,
+    "addresses": make_address,
+    "carts": make_cart,
+    "bookings": make_booking,
+}
+
+def generate_chunk(ctx: dict, kind: str, start: int, end: int) -> list:
+    generator = GENERATORS[kind]
+    return [generator(ctx, i) for i in range(start, end)]
+
+# ============= Loading =============
+
+async def load_kind(db, pool, ctx: dict, kind: str, batch_size: int, workers: int) -> int:
+    """Generate `kind` in parallel chunks and insert each chunk as it arrives."""
+    count = ctx['counts'][kind]
+    if count == 0:
+        return 0
+    collection = db[COLLECTIONS[kind]]
+    loop = asyncio.get_running_loop()
+    ranges = [(start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+    in_flight = []
+    inserted = 0
+
+    def submit(start: int, end: int) -> asyncio.Future:
+        if pool:
+            return loop.run_in_executor(pool, generate_chunk, ctx, kind, start, end)
+        future = loop.create_future()
+        future.set_result(generate_chunk(ctx, kind, start, end))
+        return future
+
+    for start, end in ranges:
+        in_flight.append(submit(start, end))
+        # Keep a couple of chunks per worker queued so generation overlaps with inserts
+        if len(in_flight) >= workers * 2:
+            docs = await in_flight.pop(0)
+            await collection.insert_many(docs, ordered=False)
+            inserted += len(docs)
+    for pending in in_flight:
+        docs = await pending
+        await collection.insert_many(docs, ordered=False)
+        inserted += len(docs)
+    return inserted
+
+async def seed_database(
+    scale: float = 1.0,
+    seed: int = 42,
+    batch_size: int = 5000,
+    workers: int = 1,
+    counts: dict = None,
+    defer_indexes: bool = False,
+    create_indexes: bool = True
+):
+    load_dotenv(Path(__file__).parent / '.env')
     mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
     db_name = os.getenv('DB_NAME', 'test_database')
     
@@ -54,87 +320,84 @@ async def seed_database():
     db = client[db_name]
     
     print("🌱 Starting database seeding...")
+    started = time.perf_counter()
+    
+    resolved_counts = {kind: int(base * scale) for kind, base in BASE_COUNTS.items()}
+    resolved_counts.update({kind: n for kind, n in (counts or {}).items() if n is not None})
+    if resolved_counts['providers'] == 0 or resolved_counts['customers'] == 0:
+        raise ValueError("At least one provider and one customer are required")
+    if resolved_counts['carts'] > resolved_counts['customers'] * resolved_counts['services']:
+        raise ValueError("More carts than distinct (customer, service) pairs")
     
-    # Clear existing services (optional)
-    await db.services.delete_many({"seeded": True})
-    print("✅ Cleared existing seeded services")
+    # bcrypt is deliberately slow, so every seeded account shares these hashes
+    ctx = {
+        "seed": seed,
+        "counts": resolved_counts,
+        "provider_password": hash_password("Provider@123"),
+        "customer_password": hash_password("Customer@123"),
+        "pin": hash_password("1234"),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
     
-    services_created = 0
-    providers_created = 0
+    for collection in sorted(set(COLLECTIONS.values())):
+        await db[collection].delete_many({"seeded": True})
+    print("✅ Cleared existing seeded data")
     
-    # Create service providers for each district and category
-    for district in DISTRICTS:
-        for category, keywords in CATEGORIES.items():
-            # Create 2-3 providers per category per district
-            num_providers = random.randint(2, 3)
-            
-            for i in range(num_providers):
-                # Create provider user
-                provider_id = str(uuid.uuid4())
-                company_name = random.choice(COMPANY_NAMES[category])
-                provider_name = f"{company_name} - {district}"
-                
-                # Generate phone number (TamilNadu area codes: 044, 0422, etc.)
-                area_codes = ['044', '0422', '0431', '04543', '0451']
-                phone = f"+91{random.choice(area_codes)}{random.randint(1000000, 9999999)}"
-                email = f"{company_name.lower().replace(' ', '')}_{district.lower()}@example.com"
-                
-                # Check if provider already exists
-                existing_provider = await db.users.find_one({"email": email})
-                
-                if not existing_provider:
-                    provider_doc = {
-                        "user_id": provider_id,
-                        "name": provider_name,
-                        "email": email,
-                        "phone": phone,
-                        "password": hash_password("Provider@123"),
-                        "pin": hash_password("1234"),
-                        "role": "provider",
-                        "verified": True,
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "district": district,
-                        "seeded": True
-                    }
-                    await db.users.insert_one(provider_doc)
-                    providers_created += 1
-                else:
-                    provider_id = existing_provider['user_id']
-                
-                # Create services for this provider
-                num_services = random.randint(1, 2)
-                for j in range(num_services):
-                    service_id = str(uuid.uuid4())
-                    keyword = random.choice(keywords)
-                    service_name = f"{category} - {keyword.title()} Service"
-                    
-                    base_price = random.randint(800, 5000)
-                    discount = random.choice([0, 5, 10, 15, 20])
-                    
-                    service_doc = {
-                        "service_id": service_id,
-                        "provider_id": provider_id,
-                        "name": service_name,
-                        "category": category,
-                        "description": DESCRIPTIONS[category],
-                        "base_price": float(base_price),
-                        "unit": "hour" if category in ["Earth Movers", "Power Tools"] else "service",
-                        "discount": float(discount),
-                        "district": district,
-                        "keywords": keywords,
-                        "rating": round(random.uniform(3.8, 5.0), 1),
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "seeded": True
-                    }
-                    
-                    await db.services.insert_one(service_doc)
-                    services_created += 1
+    if defer_indexes:
+        # Building indexes once after the load is cheaper than maintaining them per insert.
+        # Unique indexes stay: the running API relies on them to reject duplicate users and cart lines.
+        for collection in set(COLLECTIONS.values()):
+            for model in INDEXES.get(collection, []):
+                if is_unique(model):
+                    continue
+                try:
+                    await db[collection].drop_index(model.document['name'])
+                except Exception:
+                    pass
+        print("✅ Dropped secondary indexes until the load finishes")
     
-    print(f"✅ Created {providers_created} service providers")
-    print(f"✅ Created {services_created} services across all TamilNadu districts")
-    print("🎉 Database seeding completed!")
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for kind in GENERATORS:
+            kind_started = time.perf_counter()
+            inserted = await load_kind(db, pool, ctx, kind, batch_size, workers)
+            print(f"✅ Created {inserted} {kind} in {time.perf_counter() - kind_started:.1f}s")
+    finally:
+        if pool:
+            pool.shutdown()
+    
+    if create_indexes:
+        await ensure_indexes(db)
+        print("✅ Indexes created")
+    
+    providers = await ProviderStats(db).rebuild()
+    print(f"✅ Rebuilt stats for {providers} providers")
+    
+    print(f"🎉 Database seeding completed in {time.perf_counter() - started:.1f}s!")
     
     client.close()
 
+def main():
+    parser = argparse.ArgumentParser(description="Seed the marketplace with deterministic sample data.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the default document counts")
+    parser.add_argument("--seed", type=int, default=42, help="the same seed always produces the same data")
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per insert_many call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator processes")
+    for kind in BASE_COUNTS:
+        parser.add_argument(f"--{kind}", type=int, default=None, help=f"exact number of {kind} (overrides --scale)")
+    parser.add_argument("--defer-indexes", action="store_true", help="drop non-unique indexes before loading and rebuild them after")
+    parser.add_argument("--no-indexes", action="store_true", help="skip index creation after loading")
+    args = parser.parse_args()
+
+    asyncio.run(seed_database(
+        scale=args.scale,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        counts={kind: getattr(args, kind) for kind in BASE_COUNTS},
+        defer_indexes=args.defer_indexes,
+        create_indexes=not args.no_indexes
+    ))
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    main()
@@ -1,34 +1,104 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status, Depends, Header
+from fastapi import FastAPI, APIRouter, HTTPException, status, Depends, Header, Query, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
+import asyncio
+import multiprocessing
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import random
 import json
+import base64
+import time
 import hmac
 import hashlib
+import orjson
 from jose import JWTError, jwt
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from loaders import RequestLoaders, fetch_by_ids
+from indexes import ensure_indexes, check_indexes
+from search_index import ServiceSearchIndex
+from facets import ServiceFacets
+from leaderboards import ServiceLeaderboards, cursor_rank
+from export import EXPORT_FORMATS, stream_export
+from cache import QueryCache
+from passwords import PasswordHasher
+from otp_store import create_otp_store
+from idempotency import IdempotencyStore
+from events import create_event_broker
+from provider_stats import ProviderStats
+from reviews import add_rating
+from conditional import (
+    JSONBody, conditional_response, STATIC_CACHE_CONTROL, SHARED_CACHE_CONTROL, PRIVATE_CACHE_CONTROL
+)
+from metrics import MetricsMiddleware, MongoCommandListener, PoolListener, register_collector, render_metrics
+from slow_queries import SlowQueryLog
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '10'))
+# Commands slower than SLOW_QUERY_MS are explained and kept in the capped slow_queries collection
+slow_query_log = SlowQueryLog()
+pool_listener = PoolListener(MONGO_MAX_POOL_SIZE)
+# Motor connects lazily, so nothing touches the network until the lifespan below warms the pool
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    waitQueueTimeoutMS=int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    connectTimeoutMS=int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    serverSelectionTimeoutMS=int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    socketTimeoutMS=int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000')),
+    event_listeners=[MongoCommandListener(), slow_query_log, pool_listener]
+)
 db = client[os.environ['DB_NAME']]
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The server accepts no connections until this returns. If Mongo is unreachable or a
+    # unique index cannot be built, startup fails and the process exits for the supervisor
+    # to restart, rather than coming up unready.
+    await start_services()
+    try:
+        yield
+    finally:
+        await stop_services()
+
+app = FastAPI(lifespan=lifespan)
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 
+# Verified JWT payloads and /auth/me profiles, so repeat dashboard calls stay in memory
+token_cache = QueryCache(
+    max_entries=int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000')),
+    ttl=float(os.getenv('TOKEN_CACHE_TTL_SECONDS', '300'))
+)
+# Profile changes are announced to the other workers through a shared EVENT_BROKER; with the
+# in-memory broker, another worker may serve a changed profile for up to PROFILE_CACHE_TTL_SECONDS
+profile_cache = QueryCache(
+    max_entries=int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '10000')),
+    ttl=float(os.getenv('PROFILE_CACHE_TTL_SECONDS', '30'))
+)
+
+# bcrypt runs on a bounded thread pool, sized by HASH_WORKERS
+password_hasher = PasswordHasher()
+
 # ============= Models =============
 
 class UserRole(str):
@@ -74,6 +144,10 @@ class ProviderDetails(BaseModel):
     ifsc_code: Optional[str] = None
     branch_name: Optional[str] = None
 
+class ProviderLocation(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
 class UserLogin(BaseModel):
     email_or_phone: str
     password: Optional[str] = None
@@ -107,6 +181,10 @@ class ServiceUpdate(BaseModel):
     base_price: Optional[float] = None
     discount: Optional[float] = None
 
+class ReviewCreate(BaseModel):
+    rating: int = Field(..., ge=1, le=5)
+    comment: Optional[str] = Field(None, max_length=2000)
+
 class AddressCreate(BaseModel):
     user_name: str
     street_name: str
@@ -144,11 +222,23 @@ class SocialMediaUpdate(BaseModel):
 def generate_otp() -> str:
     return ''.join([str(random.randint(0, 9)) for _ in range(6)])
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def json_response(content, headers: Optional[dict] = None, status_code: int = 200) -> ORJSONResponse:
+    """Serialize straight to JSON bytes, skipping FastAPI's jsonable_encoder pass over large payloads."""
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+def geo_point(latitude: float, longitude: float) -> dict:
+    """GeoJSON point for 2dsphere indexes (coordinates are longitude first)."""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+def unit_price(service: dict) -> float:
+    """Price per hour/day after the service's discount."""
+    return service['base_price'] * (1 - service.get('discount', 0) / 100)
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
 
 def create_token(user_id: str, email: str, role: str) -> str:
     payload = {
@@ -159,12 +249,40 @@ def create_token(user_id: str, email: str, role: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def create_event_ticket(user: dict) -> str:
+    """Short-lived token that only opens /api/events, for the query string EventSource needs."""
+    payload = {
+        'user_id': user['user_id'],
+        'email': user['email'],
+        'role': user['role'],
+        'purpose': 'events',
+        'exp': datetime.now(timezone.utc) + timedelta(seconds=EVENT_TICKET_SECONDS)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def verify_event_ticket(ticket: str) -> dict:
+    try:
+        payload = jwt.decode(ticket, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return payload if payload.get('purpose') == 'events' else None
+
 def verify_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if 'purpose' in payload:
+        # Single-purpose tickets (see create_event_ticket) are not API tokens
+        return None
+    # Never keep a verified payload past the token's own expiry
+    remaining = payload['exp'] - time.time() if 'exp' in payload else token_cache.ttl
+    if remaining > 0:
+        token_cache.set(token, payload, ttl=min(token_cache.ttl, remaining))
+    return payload
 
 async def get_current_user(authorization: str = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
@@ -175,8 +293,230 @@ async def get_current_user(authorization: str = Header(None)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return payload
 
-# Mock OTP storage (use Redis in production)
-otp_storage = {}
+def encode_cursor(position: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+def valid_keyset(key) -> bool:
+    # Cursors are client-supplied; a mistyped key would make the sort comparisons fail
+    if not isinstance(key, list) or len(key) != 2:
+        return False
+    rating, service_id = key
+    rating_ok = rating is None or (isinstance(rating, (int, float)) and not isinstance(rating, bool))
+    return rating_ok and isinstance(service_id, str)
+
+def valid_offset(offset) -> bool:
+    return isinstance(offset, int) and not isinstance(offset, bool) and offset >= 0
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    valid = isinstance(position, dict) and ("k" in position or "o" in position) and (
+        ("k" not in position or valid_keyset(position["k"]))
+        and ("o" not in position or valid_offset(position["o"]))
+    )
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+def keyset_after(rating: Optional[float], service_id: str) -> dict:
+    """Filter for services sorted after (rating, service_id) in (rating desc, service_id desc) order."""
+    # Services without a rating sort after every rated one
+    if rating is None:
+        return {"rating": None, "service_id": {"$lt": service_id}}
+    return {"$or": [
+        {"rating": {"$lt": rating}},
+        {"rating": None},
+        {"rating": rating, "service_id": {"$lt": service_id}}
+    ]}
+
+# Keyword search index over the services collection, built on startup
+service_index = ServiceSearchIndex()
+
+# District x category x price bucket counts for the discovery filters, built on startup
+service_facets = ServiceFacets()
+
+# Best-rated services per (district, category), answering keyword-less listings from memory
+service_leaderboards = ServiceLeaderboards()
+
+# Discovery results, invalidated whenever a provider changes a service
+CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '60'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+discovery_cache = QueryCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+# Serialized service details with their ETags, so repeat views skip both Mongo and encoding
+service_detail_cache = QueryCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+
+def invalidate_service_caches(service_id: str):
+    discovery_cache.clear()
+    service_detail_cache.invalidate(service_id)
+
+def get_loaders() -> RequestLoaders:
+    return RequestLoaders(db)
+
+# OTPs expire after OTP_TTL_SECONDS; set OTP_STORE=mongo when running several workers
+otp_store = create_otp_store(db)
+
+# Booking changes pushed to /api/events; EVENT_BROKER=mongo shares them across workers
+event_broker = create_event_broker()
+EVENT_HEARTBEAT_SECONDS = float(os.getenv('EVENT_HEARTBEAT_SECONDS', '15'))
+# Lifetime of the tickets EventSource clients put in the /api/events query string instead of their token
+EVENT_TICKET_SECONDS = int(os.getenv('EVENT_TICKET_SECONDS', '60'))
+
+BOOKING_CHANGE_PROJECTION = {
+    "_id": 0, "booking_id": 1, "user_id": 1, "provider_id": 1, "status": 1, "payment_status": 1,
+    "total_amount": 1, "created_at": 1, "updated_at": 1, "completed_at": 1
+}
+
+# Per-provider booking counts and revenue, kept current by every booking write below
+provider_stats = ProviderStats(db)
+
+async def change_booking_status(booking_id: str, status: str, extra: Optional[dict] = None) -> Optional[dict]:
+    """Set a booking's status and move its provider counters. Returns the updated booking, if any."""
+    now = datetime.now(timezone.utc).isoformat()
+    changes = {"status": status, "updated_at": now, **(extra or {})}
+    # Matching on the old status makes the transition atomic: only one writer sees each before-image
+    before = await db.bookings.find_one_and_update(
+        {"booking_id": booking_id, "status": {"$ne": status}},
+        {"$set": {**changes, **({"completed_at": now} if status == 'completed' else {})}},
+        projection=BOOKING_CHANGE_PROJECTION,
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        # Missing, or already in this status, so there is no transition to count
+        return await db.bookings.find_one_and_update(
+            {"booking_id": booking_id},
+            {"$set": changes},
+            projection=BOOKING_CHANGE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+    after = {**before, **changes}
+    if status == 'completed':
+        after['completed_at'] = now
+    await provider_stats.booking_changed(before, after)
+    return after
+
+async def publish_booking_event(event_type: str, booking: dict):
+    """Tell the booking's customer and provider to refetch it."""
+    await event_broker.publish(
+        [f"user:{booking['user_id']}", f"user:{booking['provider_id']}"],
+        {
+            "type": event_type,
+            "booking_id": booking['booking_id'],
+            "status": booking.get('status'),
+            "payment_status": booking.get('payment_status'),
+            "at": datetime.now(timezone.utc).isoformat()
+        }
+    )
+
+# Every worker keeps its own leaderboards, search index and facet counts. With a shared broker,
+# service changes are announced on this channel so the other workers apply them too.
+SERVICES_CHANNEL = "services"
+# Likewise for changes to a user's cached /auth/me profile
+USERS_CHANNEL = "users"
+WORKER_ID = str(uuid.uuid4())
+
+def runs_single_worker() -> bool:
+    """Best guess at whether this process is the only one serving the API.
+
+    WEB_CONCURRENCY wins when set (gunicorn reads it too). Otherwise `uvicorn --workers N`
+    and `--reload` both start the app in a multiprocessing child, so a process with a
+    multiprocessing parent is assumed to have siblings; set WEB_CONCURRENCY=1 to keep the
+    in-memory copies under --reload.
+    """
+    workers = os.getenv('WEB_CONCURRENCY')
+    if workers is not None:
+        return int(workers) <= 1
+    return multiprocessing.parent_process() is None
+
+# The search index, facets and leaderboards are only trusted when every change reaches them:
+# either this is the only worker, or changes are shared through the broker. Otherwise
+# keyword search, facets and listings are answered from Mongo.
+LOCAL_SERVICE_COPIES = event_broker.shared or runs_single_worker()
+# Holds this worker's subscriptions to SERVICES_CHANNEL and USERS_CHANNEL and the tasks applying them
+service_sync = AsyncExitStack()
+
+def facet_fields(service: Optional[dict]) -> Optional[dict]:
+    """The fields ServiceFacets counts a service by, or None for no service."""
+    if service is None:
+        return None
+    return {field: service.get(field) for field in ("district", "category", "base_price")}
+
+async def publish_service_changes(service_ids: List[str], facets: Optional[List[list]] = None):
+    """Tell the other workers these services were created, changed or deleted.
+
+    `facets` lists [before, after] facet_fields pairs for changes that move facet counts. Facet
+    counts only add and subtract, so workers applying the pairs in any order agree.
+    """
+    if event_broker.shared and service_ids:
+        await event_broker.publish(
+            [SERVICES_CHANNEL],
+            {"type": "services.changed", "service_ids": service_ids, "facets": facets or [], "origin": WORKER_ID}
+        )
+
+async def reload_services(service_ids: List[str], facets: List[list]):
+    """Bring this worker's in-memory copies of these services in line with Mongo."""
+    for before, after in facets:
+        if before:
+            service_facets.remove(before)
+        if after:
+            service_facets.add(after)
+    found = {}
+    async for service in db.services.find({"service_id": {"$in": service_ids}}, {"_id": 0}):
+        found[service['service_id']] = service
+    for service_id in service_ids:
+        service = found.get(service_id)
+        if service:
+            service_index.add(service)
+            await service_leaderboards.upsert(db, service)
+        else:
+            service_index.remove(service_id)
+            await service_leaderboards.remove(db, service_id)
+        invalidate_service_caches(service_id)
+
+async def follow_service_changes(subscription):
+    dropped = subscription.dropped
+    while True:
+        event = await subscription.get()
+        try:
+            if subscription.dropped != dropped:
+                # Fell behind and lost changes, so start over from Mongo
+                dropped = subscription.dropped
+                await service_index.build(db)
+                await service_facets.build(db)
+                await service_leaderboards.build(db)
+                discovery_cache.clear()
+            elif event.get("origin") != WORKER_ID:
+                await reload_services(event["service_ids"], event.get("facets", []))
+        except Exception:
+            logger.exception("Failed to apply service changes from another worker")
+
+async def invalidate_profile(user_id: str):
+    """Drop a user's cached profile here and, with a shared broker, on every other worker."""
+    profile_cache.invalidate(user_id)
+    if event_broker.shared:
+        await event_broker.publish([USERS_CHANNEL], {"type": "profile.changed", "user_id": user_id, "origin": WORKER_ID})
+
+async def follow_profile_changes(subscription):
+    dropped = subscription.dropped
+    while True:
+        event = await subscription.get()
+        if subscription.dropped != dropped:
+            # Lost some invalidations, so none of the cached profiles can be trusted
+            dropped = subscription.dropped
+            profile_cache.clear()
+        elif event.get("origin") != WORKER_ID:
+            profile_cache.invalidate(event["user_id"])
+
+# First responses to POST /bookings and /payments/create-order, keyed by the Idempotency-Key header
+idempotency_store = IdempotencyStore(db)
+
+async def idempotent(scope: str, key: Optional[str], data: BaseModel, handler):
+    """Run a create handler at most once per Idempotency-Key; requests without the header run as usual."""
+    if key is None:
+        return await handler()
+    response, replayed = await idempotency_store.run(scope, key, data.model_dump(), handler)
+    return json_response(response, headers={"Idempotent-Replayed": "true"} if replayed else None)
 
 # ============= Authentication Routes =============
 
@@ -191,9 +531,7 @@ async def register_user(data: UserRegister):
     if data.pin != data.pin_confirm:
         raise HTTPException(status_code=400, detail="Pin does not match")
     
-    existing_user = await db.users.find_one({"$or": [{"email": data.email}, {"phone": data.phone}]}, {"_id": 0})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User already exists")
+    password_hash, pin_hash = await asyncio.gather(hash_password(data.password), hash_password(data.pin))
     
     user_id = str(uuid.uuid4())
     user_doc = {
@@ -201,18 +539,21 @@ async def register_user(data: UserRegister):
         "name": data.name,
         "email": data.email,
         "phone": data.phone,
-        "password": hash_password(data.password),
-        "pin": hash_password(data.pin),
+        "password": password_hash,
+        "pin": pin_hash,
         "role": data.role,
         "verified": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.users.insert_one(user_doc)
+    # Unique indexes on email and phone reject duplicates without a separate lookup
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User already exists")
     
     otp = generate_otp()
-    otp_storage[data.email] = {"otp": otp, "created_at": datetime.now(timezone.utc)}
-    otp_storage[data.phone] = {"otp": otp, "created_at": datetime.now(timezone.utc)}
+    await asyncio.gather(otp_store.put(data.email, otp), otp_store.put(data.phone, otp))
     
     return {
         "message": "OTP sent to registered email address and mobile number",
@@ -222,15 +563,11 @@ async def register_user(data: UserRegister):
 
 @api_router.post("/auth/verify-otp")
 async def verify_otp(data: OTPVerify):
-    if data.contact not in otp_storage:
+    stored_otp = await otp_store.get(data.contact)
+    if stored_otp is None:
         raise HTTPException(status_code=400, detail="OTP not found or expired")
     
-    stored = otp_storage[data.contact]
-    if (datetime.now(timezone.utc) - stored['created_at']).seconds > 300:
-        del otp_storage[data.contact]
-        raise HTTPException(status_code=400, detail="OTP expired")
-    
-    if stored['otp'] != data.otp:
+    if stored_otp != data.otp:
         raise HTTPException(status_code=400, detail="Invalid OTP")
     
     user = await db.users.find_one({"$or": [{"email": data.contact}, {"phone": data.contact}]}, {"_id": 0})
@@ -239,8 +576,9 @@ async def verify_otp(data: OTPVerify):
             {"user_id": user['user_id']},
             {"$set": {"verified": True}}
         )
+        await invalidate_profile(user['user_id'])
     
-    del otp_storage[data.contact]
+    await otp_store.delete(data.contact)
     return {"message": "OTP verified successfully", "verified": True}
 
 @api_router.post("/auth/login")
@@ -259,12 +597,12 @@ async def login_user(data: UserLogin):
     if data.login_type == "password":
         if not data.password:
             raise HTTPException(status_code=400, detail="Password required")
-        if not verify_password(data.password, user['password']):
+        if not await verify_password(data.password, user['password']):
             raise HTTPException(status_code=400, detail="Invalid credentials")
     elif data.login_type == "pin":
         if not data.pin:
             raise HTTPException(status_code=400, detail="PIN required")
-        if not verify_password(data.pin, user['pin']):
+        if not await verify_password(data.pin, user['pin']):
             raise HTTPException(status_code=400, detail="Invalid PIN")
     
     token = create_token(user['user_id'], user['email'], user['role'])
@@ -290,7 +628,7 @@ async def request_change_pin(data: OTPRequest):
         raise HTTPException(status_code=400, detail="User not found")
     
     otp = generate_otp()
-    otp_storage[data.contact] = {"otp": otp, "created_at": datetime.now(timezone.utc)}
+    await otp_store.put(data.contact, otp)
     
     return {
         "message": f"OTP has been sent to registered mail address/mobile number",
@@ -302,11 +640,11 @@ async def change_pin(data: ChangePinRequest):
     if data.new_pin != data.confirm_pin:
         raise HTTPException(status_code=400, detail="Pin does not match")
     
-    if data.email_or_phone not in otp_storage:
+    stored_otp = await otp_store.get(data.email_or_phone)
+    if stored_otp is None:
         raise HTTPException(status_code=400, detail="Please request OTP first")
     
-    stored = otp_storage[data.email_or_phone]
-    if stored['otp'] != data.otp:
+    if stored_otp != data.otp:
         raise HTTPException(status_code=400, detail="Invalid OTP")
     
     user = await db.users.find_one(
@@ -319,15 +657,19 @@ async def change_pin(data: ChangePinRequest):
     
     await db.users.update_one(
         {"user_id": user['user_id']},
-        {"$set": {"pin": hash_password(data.new_pin)}}
+        {"$set": {"pin": await hash_password(data.new_pin)}}
     )
+    await invalidate_profile(user['user_id'])
     
-    del otp_storage[data.email_or_phone]
+    await otp_store.delete(data.email_or_phone)
     return {"message": "PIN changed successfully"}
 
 @api_router.get("/auth/me")
 async def get_me(current_user: dict = Depends(get_current_user)):
-    user = await db.users.find_one({"user_id": current_user['user_id']}, {"_id": 0, "password": 0, "pin": 0})
+    return await profile_cache.get_or_load(current_user['user_id'], lambda: find_profile(current_user['user_id']))
+
+async def find_profile(user_id: str):
+    user = await db.users.find_one({"user_id": user_id}, {"_id": 0, "password": 0, "pin": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -344,10 +686,23 @@ async def create_service(data: ServiceCreate, current_user: dict = Depends(get_c
         "service_id": service_id,
         "provider_id": current_user['user_id'],
         **data.model_dump(),
+        # Filled in by reviews; unrated services sort after rated ones
+        "rating": None,
+        "rating_count": 0,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
+    # Services are located where their provider operates from
+    provider = await db.users.find_one({"user_id": current_user['user_id']}, {"_id": 0, "location": 1})
+    if provider and provider.get('location'):
+        service_doc['location'] = provider['location']
+    
     await db.services.insert_one(service_doc)
+    service_index.add(service_doc)
+    service_facets.add(service_doc)
+    await service_leaderboards.upsert(db, service_doc)
+    invalidate_service_caches(service_id)
+    await publish_service_changes([service_id], facets=[[None, facet_fields(service_doc)]])
     return {"message": "Service added successfully", "service_id": service_id}
 
 @api_router.get("/providers/services")
@@ -356,7 +711,7 @@ async def get_my_services(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Only service providers can view their services")
     
     services = await db.services.find({"provider_id": current_user['user_id']}, {"_id": 0}).to_list(1000)
-    return services
+    return json_response(services)
 
 @api_router.put("/providers/services/{service_id}")
 async def update_service(service_id: str, data: ServiceUpdate, current_user: dict = Depends(get_current_user)):
@@ -373,6 +728,14 @@ async def update_service(service_id: str, data: ServiceUpdate, current_user: dic
             {"service_id": service_id},
             {"$set": update_data}
         )
+        service_index.add({**service, **update_data})
+        service_facets.remove(service)
+        service_facets.add({**service, **update_data})
+        await service_leaderboards.upsert(db, {**service, **update_data})
+        invalidate_service_caches(service_id)
+        await publish_service_changes(
+            [service_id], facets=[[facet_fields(service), facet_fields({**service, **update_data})]]
+        )
     
     return {"message": "Service updated successfully"}
 
@@ -381,10 +744,18 @@ async def delete_service(service_id: str, current_user: dict = Depends(get_curre
     if current_user['role'] != 'provider':
         raise HTTPException(status_code=403, detail="Only service providers can delete services")
     
-    result = await db.services.delete_one({"service_id": service_id, "provider_id": current_user['user_id']})
-    if result.deleted_count == 0:
+    service = await db.services.find_one_and_delete(
+        {"service_id": service_id, "provider_id": current_user['user_id']},
+        {"_id": 0, "district": 1, "category": 1, "base_price": 1}
+    )
+    if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    service_index.remove(service_id)
+    service_facets.remove(service)
+    await service_leaderboards.remove(db, service_id)
+    invalidate_service_caches(service_id)
+    await publish_service_changes([service_id], facets=[[facet_fields(service), None]])
     return {"message": "Service deleted successfully"}
 
 @api_router.put("/providers/payment-details")
@@ -396,9 +767,53 @@ async def update_payment_details(data: ProviderDetails, current_user: dict = Dep
         {"user_id": current_user['user_id']},
         {"$set": {"payment_details": data.model_dump()}}
     )
+    await invalidate_profile(current_user['user_id'])
     
     return {"message": "Payment details updated successfully"}
 
+@api_router.get("/providers/stats")
+async def get_provider_stats(
+    provider_id: Optional[str] = Query(None, description="Admins only: the provider to report on"),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user['role'] == 'provider':
+        provider_id = current_user['user_id']
+    elif current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only providers can view stats")
+    elif not provider_id:
+        raise HTTPException(status_code=400, detail="provider_id is required")
+    
+    return json_response(await provider_stats.get(provider_id))
+
+@api_router.put("/providers/location")
+async def update_provider_location(data: ProviderLocation, current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'provider':
+        raise HTTPException(status_code=403, detail="Only service providers can update their location")
+    
+    location = geo_point(data.latitude, data.longitude)
+    await db.users.update_one(
+        {"user_id": current_user['user_id']},
+        {"$set": {"location": location}}
+    )
+    await db.services.update_many(
+        {"provider_id": current_user['user_id']},
+        {"$set": {"location": location}}
+    )
+    await invalidate_profile(current_user['user_id'])
+    
+    service_ids = []
+    async for service in db.services.find({"provider_id": current_user['user_id']}, {"_id": 0, "service_id": 1}):
+        indexed = service_index.get(service['service_id'])
+        if indexed:
+            service_index.add({**indexed, "location": location})
+        service_leaderboards.patch(service['service_id'], {"location": location})
+        service_detail_cache.invalidate(service['service_id'])
+        service_ids.append(service['service_id'])
+    discovery_cache.clear()
+    await publish_service_changes(service_ids)
+    
+    return {"message": "Location updated successfully"}
+
 # ============= Service Discovery Routes =============
 
 @api_router.get("/services")
@@ -407,8 +822,85 @@ async def get_services(
     category: Optional[str] = None,
     keyword: Optional[str] = None,
     min_price: Optional[float] = None,
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    # Identical searches share one cached result and one in-flight Mongo query
+    key = (
+        (district or '').strip().lower(),
+        (category or '').strip().lower(),
+        (keyword or '').strip().lower(),
+        min_price,
+        max_price,
+        limit,
+        cursor
+    )
+    return json_response(await discovery_cache.get_or_load(
+        key,
+        lambda: find_services(district, category, keyword, min_price, max_price, limit, cursor)
+    ))
+
+async def find_services(
+    district: Optional[str],
+    category: Optional[str],
+    keyword: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    limit: Optional[int],
+    cursor: Optional[str]
 ):
+    paginated = limit is not None or cursor is not None
+    page_size = limit or 1000
+    position = decode_cursor(cursor) if cursor else None
+    next_cursor = None
+    
+    if keyword and service_index.ready:
+        # Keyword searches are served from the in-memory index, ranked by relevance.
+        # Their cursor is an offset into the ranked results.
+        offset = position.get("o", 0) if position else 0
+        matches = service_index.search(keyword, district, category, min_price, max_price, limit=offset + page_size + 1)
+        services = matches[offset:offset + page_size]
+        if len(matches) > offset + page_size:
+            next_cursor = encode_cursor({"o": offset + page_size})
+    else:
+        after = cursor_rank(*position["k"]) if position and "k" in position else None
+        fetch = page_size + 1 if paginated else page_size
+        services = None
+        if not keyword:
+            # An empty filter means no filter, as in find_services_in_mongo
+            services = service_leaderboards.query(district or None, category or None, min_price, max_price, after, fetch)
+        if services is None:
+            services = await find_services_in_mongo(district, category, keyword, min_price, max_price, position, fetch)
+        if len(services) > page_size:
+            services = services[:page_size]
+            last = services[-1]
+            next_cursor = encode_cursor({"k": [last.get('rating'), last['service_id']]})
+    
+    # One $in query for all providers instead of a find_one per service
+    providers = await fetch_by_ids(
+        db.users,
+        "user_id",
+        [service['provider_id'] for service in services],
+        {"_id": 0, "name": 1, "phone": 1, "email": 1, "district": 1}
+    )
+    
+    for service in services:
+        service['provider'] = providers.get(service['provider_id'])
+    
+    if paginated:
+        return {"services": services, "next_cursor": next_cursor}
+    return services
+
+async def find_services_in_mongo(
+    district: Optional[str],
+    category: Optional[str],
+    keyword: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    position: Optional[dict],
+    fetch: int
+) -> List[dict]:
     query = {}
     
     if district:
@@ -432,27 +924,121 @@ async def get_services(
         if max_price is not None:
             query["base_price"]["$lte"] = max_price
     
-    # Fetch services and sort by rating (descending)
-    services = await db.services.find(query, {"_id": 0}).sort("rating", -1).to_list(1000)
-    
+    # Keyset pagination: resume strictly after the last (rating, service_id) seen
+    if position and "k" in position:
+        query = {"$and": [query, keyset_after(*position["k"])]}
+    
+    # Sort by rating (descending), service_id breaking ties
+    return await db.services.find(query, {"_id": 0}).sort(
+        [("rating", -1), ("service_id", -1)]
+    ).to_list(fetch)
+
+async def count_facets_in_mongo() -> dict:
+    facets = ServiceFacets()
+    await facets.build(db)
+    return facets.snapshot()
+
+@api_router.get("/services/facets")
+async def get_service_facets():
+    if not LOCAL_SERVICE_COPIES:
+        # Counted from Mongo and cached like other discovery results
+        return await discovery_cache.get_or_load(("facets",), count_facets_in_mongo)
+    if not service_facets.ready:
+        raise HTTPException(status_code=503, detail="Facets are still being built")
+    return service_facets.snapshot()
+
+@api_router.get("/services/nearby")
+async def get_nearby_services(
+    address_id: Optional[str] = None,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=1000),
+    k: Optional[int] = Query(None, ge=1, le=100),
+    category: Optional[str] = None,
+    authorization: str = Header(None)
+):
+    """Services ranked by distance from a saved address or a coordinate.
+
+    Returns every service within `radius_km`, or with `k` the k nearest regardless of radius.
+    """
+    if address_id:
+        current_user = await get_current_user(authorization)
+        address = await db.addresses.find_one(
+            {"address_id": address_id, "user_id": current_user['user_id']},
+            {"_id": 0, "latitude": 1, "longitude": 1}
+        )
+        if not address:
+            raise HTTPException(status_code=404, detail="Address not found")
+        if address.get('latitude') is None or address.get('longitude') is None:
+            raise HTTPException(status_code=400, detail="Address has no coordinates")
+        latitude, longitude = address['latitude'], address['longitude']
+    elif latitude is None or longitude is None:
+        raise HTTPException(status_code=400, detail="Provide address_id or latitude and longitude")
+    
+    geo_near = {
+        "near": geo_point(latitude, longitude),
+        "distanceField": "distance_km",
+        "distanceMultiplier": 0.001,
+        "spherical": True,
+        "key": "location"
+    }
+    if category:
+        geo_near["query"] = {"category": {"$regex": category, "$options": "i"}}
+    if k is None:
+        geo_near["maxDistance"] = radius_km * 1000
+    
+    # The 2dsphere index prunes by distance and $geoNear returns results nearest first
+    services = await db.services.aggregate([
+        {"$geoNear": geo_near},
+        {"$limit": k or 1000},
+        {"$project": {"_id": 0}}
+    ]).to_list(k or 1000)
+    
+    providers = await fetch_by_ids(
+        db.users,
+        "user_id",
+        [service['provider_id'] for service in services],
+        {"_id": 0, "name": 1, "phone": 1, "email": 1, "district": 1}
+    )
     for service in services:
-        provider = await db.users.find_one({"user_id": service['provider_id']}, {"_id": 0, "name": 1, "phone": 1, "email": 1, "district": 1})
-        service['provider'] = provider
-        # Use the rating from the seeded data if available, otherwise generate
-        if 'rating' not in service:
-            service['rating'] = round(random.uniform(3.5, 5.0), 1)
+        service['provider'] = providers.get(service['provider_id'])
+        service['distance_km'] = round(service['distance_km'], 2)
     
-    return services
+    return json_response(services)
 
 @api_router.get("/services/{service_id}")
-async def get_service_detail(service_id: str):
+async def get_service_detail(service_id: str, request: Request):
+    payload = await service_detail_cache.get_or_load(
+        service_id, lambda: load_service_detail_body(service_id)
+    )
+    return conditional_response(request, payload, SHARED_CACHE_CONTROL)
+
+async def load_service_detail_body(service_id: str) -> JSONBody:
+    return JSONBody(await find_service_detail(service_id))
+
+@api_router.get("/services/{service_id}/reviews")
+async def get_service_reviews(
+    service_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    reviews = await db.reviews.find(
+        {"service_id": service_id}, {"_id": 0, "provider_id": 0}
+    ).sort("created_at", -1).to_list(limit)
+    
+    users = await loaders.users.load_many([review['user_id'] for review in reviews])
+    for review, user in zip(reviews, users):
+        review['user_name'] = user['name'] if user else None
+    
+    return json_response(reviews)
+
+async def find_service_detail(service_id: str):
     service = await db.services.find_one({"service_id": service_id}, {"_id": 0})
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
     provider = await db.users.find_one({"user_id": service['provider_id']}, {"_id": 0, "name": 1, "phone": 1, "email": 1})
     service['provider'] = provider
-    service['rating'] = round(random.uniform(3.5, 5.0), 1)
     
     return service
 
@@ -463,36 +1049,53 @@ async def add_to_cart(data: CartItem, current_user: dict = Depends(get_current_u
     if current_user['role'] != 'user':
         raise HTTPException(status_code=403, detail="Only users can add to cart")
     
-    service = await db.services.find_one({"service_id": data.service_id}, {"_id": 0})
+    service = await db.services.find_one({"service_id": data.service_id}, {"_id": 0, "service_id": 1})
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    cart_item = {
-        "cart_id": str(uuid.uuid4()),
-        "user_id": current_user['user_id'],
-        "service_id": data.service_id,
-        "hours_days": data.hours_days,
-        "added_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    await db.cart.insert_one(cart_item)
-    return {"message": "Service added to cart"}
+    # One line per service: adding it again adds to the hours/days already in the cart
+    now = datetime.now(timezone.utc).isoformat()
+    cart_item = await db.cart.find_one_and_update(
+        {"user_id": current_user['user_id'], "service_id": data.service_id},
+        {
+            "$inc": {"hours_days": data.hours_days},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"cart_id": str(uuid.uuid4()), "added_at": now}
+        },
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"message": "Service added to cart", "cart_id": cart_item['cart_id'], "hours_days": cart_item['hours_days']}
 
 @api_router.get("/cart")
-async def get_cart(current_user: dict = Depends(get_current_user)):
+async def get_cart(current_user: dict = Depends(get_current_user), loaders: RequestLoaders = Depends(get_loaders)):
     if current_user['role'] != 'user':
         raise HTTPException(status_code=403, detail="Only users can view cart")
     
     cart_items = await db.cart.find({"user_id": current_user['user_id']}, {"_id": 0}).to_list(1000)
+    services = await loaders.services.load_many([item['service_id'] for item in cart_items])
     
-    for item in cart_items:
-        service = await db.services.find_one({"service_id": item['service_id']}, {"_id": 0})
+    subtotal = 0.0
+    total = 0.0
+    for item, service in zip(cart_items, services):
         item['service'] = service
         if service:
-            final_price = service['base_price'] * (1 - service['discount'] / 100)
-            item['total_amount'] = final_price * item['hours_days']
-    
-    return cart_items
+            item['unit_price'] = round(unit_price(service), 2)
+            item['total_amount'] = round(unit_price(service) * item['hours_days'], 2)
+            subtotal += service['base_price'] * item['hours_days']
+            total += item['total_amount']
+    
+    return json_response({
+        "items": cart_items,
+        "summary": {
+            "item_count": len(cart_items),
+            "unavailable_count": sum(1 for service in services if not service),
+            "subtotal": round(subtotal, 2),
+            "discount": round(subtotal - total, 2),
+            "total_amount": round(total, 2)
+        }
+    })
 
 @api_router.delete("/cart/{cart_id}")
 async def remove_from_cart(cart_id: str, current_user: dict = Depends(get_current_user)):
@@ -503,16 +1106,25 @@ async def remove_from_cart(cart_id: str, current_user: dict = Depends(get_curren
     return {"message": "Item removed from cart"}
 
 @api_router.post("/bookings")
-async def create_booking(data: BookingCreate, current_user: dict = Depends(get_current_user)):
+async def create_booking(
+    data: BookingCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     if current_user['role'] != 'user':
         raise HTTPException(status_code=403, detail="Only users can create bookings")
     
+    return await idempotent(
+        f"bookings:{current_user['user_id']}", idempotency_key, data,
+        lambda: insert_booking(data, current_user)
+    )
+
+async def insert_booking(data: BookingCreate, current_user: dict) -> dict:
     service = await db.services.find_one({"service_id": data.service_id}, {"_id": 0})
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    final_price = service['base_price'] * (1 - service['discount'] / 100)
-    total_amount = final_price * data.hours_days
+    total_amount = unit_price(service) * data.hours_days
     
     booking_id = str(uuid.uuid4())
     booking_doc = {
@@ -530,6 +1142,8 @@ async def create_booking(data: BookingCreate, current_user: dict = Depends(get_c
     }
     
     await db.bookings.insert_one(booking_doc)
+    await provider_stats.booking_created(booking_doc)
+    await publish_booking_event("booking.created", booking_doc)
     
     await db.cart.delete_many({"user_id": current_user['user_id'], "service_id": data.service_id})
     
@@ -540,7 +1154,7 @@ async def create_booking(data: BookingCreate, current_user: dict = Depends(get_c
     }
 
 @api_router.get("/bookings")
-async def get_bookings(current_user: dict = Depends(get_current_user)):
+async def get_bookings(current_user: dict = Depends(get_current_user), loaders: RequestLoaders = Depends(get_loaders)):
     if current_user['role'] == 'user':
         bookings = await db.bookings.find({"user_id": current_user['user_id']}, {"_id": 0}).to_list(1000)
     elif current_user['role'] == 'provider':
@@ -548,20 +1162,22 @@ async def get_bookings(current_user: dict = Depends(get_current_user)):
     else:
         bookings = await db.bookings.find({}, {"_id": 0}).to_list(1000)
     
-    for booking in bookings:
-        service = await db.services.find_one({"service_id": booking['service_id']}, {"_id": 0})
+    # Users and providers share one loader, so both sides resolve in a single $in query
+    services, users, providers = await asyncio.gather(
+        loaders.services.load_many([booking['service_id'] for booking in bookings]),
+        loaders.users.load_many([booking['user_id'] for booking in bookings]),
+        loaders.users.load_many([booking['provider_id'] for booking in bookings])
+    )
+    
+    for booking, service, user, provider in zip(bookings, services, users, providers):
         booking['service'] = service
-        
-        user = await db.users.find_one({"user_id": booking['user_id']}, {"_id": 0, "name": 1, "email": 1, "phone": 1})
         booking['user'] = user
-        
-        provider = await db.users.find_one({"user_id": booking['provider_id']}, {"_id": 0, "name": 1, "email": 1, "phone": 1})
         booking['provider'] = provider
     
-    return bookings
+    return json_response(bookings)
 
 @api_router.get("/bookings/{booking_id}")
-async def get_booking_status(booking_id: str):
+async def get_booking_status(booking_id: str, request: Request):
     booking = await db.bookings.find_one({"booking_id": booking_id}, {"_id": 0})
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -569,7 +1185,46 @@ async def get_booking_status(booking_id: str):
     service = await db.services.find_one({"service_id": booking['service_id']}, {"_id": 0})
     booking['service'] = service
     
-    return booking
+    return conditional_response(request, JSONBody(booking), PRIVATE_CACHE_CONTROL)
+
+@api_router.post("/bookings/{booking_id}/review")
+async def create_review(booking_id: str, data: ReviewCreate, current_user: dict = Depends(get_current_user)):
+    booking = await db.bookings.find_one(
+        {"booking_id": booking_id, "user_id": current_user['user_id']},
+        {"_id": 0, "service_id": 1, "provider_id": 1, "status": 1}
+    )
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if booking['status'] != 'completed':
+        raise HTTPException(status_code=400, detail="Only completed bookings can be reviewed")
+    
+    review_doc = {
+        "review_id": str(uuid.uuid4()),
+        "booking_id": booking_id,
+        "service_id": booking['service_id'],
+        "provider_id": booking['provider_id'],
+        "user_id": current_user['user_id'],
+        "rating": data.rating,
+        "comment": data.comment,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    # The unique booking_id index allows one review per booking, even under concurrent submits
+    try:
+        await db.reviews.insert_one(review_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Booking already reviewed")
+    
+    rating = await add_rating(db.services, booking['service_id'], data.rating)
+    if rating:
+        # The new rating can move the service in the search ranking and its leaderboard
+        service = await db.services.find_one({"service_id": booking['service_id']}, {"_id": 0})
+        if service:
+            service_index.add(service)
+            await service_leaderboards.upsert(db, service)
+    invalidate_service_caches(booking['service_id'])
+    await publish_service_changes([booking['service_id']])
+    
+    return {"message": "Review submitted successfully", "review_id": review_doc['review_id'], **(rating or {})}
 
 @api_router.put("/bookings/{booking_id}/status")
 async def update_booking_status(booking_id: str, status: str, current_user: dict = Depends(get_current_user)):
@@ -579,13 +1234,52 @@ async def update_booking_status(booking_id: str, status: str, current_user: dict
     if status not in ['pending', 'in_progress', 'completed', 'cancelled']:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    await db.bookings.update_one(
-        {"booking_id": booking_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
+    booking = await change_booking_status(booking_id, status)
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    await publish_booking_event("booking.status", booking)
     
     return {"message": "Booking status updated successfully"}
 
+# ============= Event Routes =============
+
+@api_router.post("/events/ticket")
+async def create_events_ticket(current_user: dict = Depends(get_current_user)):
+    # Query strings end up in access logs and browser history, so the long-lived token stays out of them
+    return {"ticket": create_event_ticket(current_user), "expires_in": EVENT_TICKET_SECONDS}
+
+@api_router.get("/events")
+async def stream_events(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="From POST /events/ticket, for EventSource clients that cannot set headers"),
+    authorization: Optional[str] = Header(None)
+):
+    """Server-Sent Events for the signed-in user's bookings. Each event names a booking to refetch."""
+    if ticket:
+        current_user = verify_event_ticket(ticket)
+        if not current_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid ticket")
+    else:
+        current_user = await get_current_user(authorization)
+    
+    async def event_stream():
+        async with event_broker.subscribe(f"user:{current_user['user_id']}") as subscription:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"event: " + event['type'].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============= Address Routes =============
 
 @api_router.post("/addresses")
@@ -604,7 +1298,7 @@ async def create_address(data: AddressCreate, current_user: dict = Depends(get_c
 @api_router.get("/addresses")
 async def get_addresses(current_user: dict = Depends(get_current_user)):
     addresses = await db.addresses.find({"user_id": current_user['user_id']}, {"_id": 0}).to_list(1000)
-    return addresses
+    return json_response(addresses)
 
 @api_router.delete("/addresses/{address_id}")
 async def delete_address(address_id: str, current_user: dict = Depends(get_current_user)):
@@ -617,7 +1311,17 @@ async def delete_address(address_id: str, current_user: dict = Depends(get_curre
 # ============= Payment Routes (Mock) =============
 
 @api_router.post("/payments/create-order")
-async def create_payment_order(data: PaymentCreate, current_user: dict = Depends(get_current_user)):
+async def create_payment_order(
+    data: PaymentCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    return await idempotent(
+        f"payments:{current_user['user_id']}", idempotency_key, data,
+        lambda: insert_payment_order(data, current_user)
+    )
+
+async def insert_payment_order(data: PaymentCreate, current_user: dict) -> dict:
     order_id = str(uuid.uuid4())
     
     payment_doc = {
@@ -651,10 +1355,9 @@ async def verify_payment(payment_id: str, booking_id: str):
         {"$set": {"status": "completed"}}
     )
     
-    await db.bookings.update_one(
-        {"booking_id": booking_id},
-        {"$set": {"status": "completed", "payment_status": "paid"}}
-    )
+    booking = await change_booking_status(booking_id, "completed", {"payment_status": "paid"})
+    if booking:
+        await publish_booking_event("payment.verified", booking)
     
     return {
         "message": "Payment verified successfully",
@@ -689,7 +1392,7 @@ async def update_social_media(data: SocialMediaUpdate, current_user: dict = Depe
     if current_user['role'] != 'admin':
         raise HTTPException(status_code=403, detail="Only admin can update social media")
     
-    if data.platform not in otp_storage or otp_storage[data.platform]['otp'] != data.otp:
+    if await otp_store.get(data.platform) != data.otp:
         raise HTTPException(status_code=400, detail="Invalid OTP")
     
     await db.settings.update_one(
@@ -698,7 +1401,7 @@ async def update_social_media(data: SocialMediaUpdate, current_user: dict = Depe
         upsert=True
     )
     
-    del otp_storage[data.platform]
+    await otp_store.delete(data.platform)
     return {"message": "Social media link updated successfully"}
 
 @api_router.post("/admin/request-otp")
@@ -707,47 +1410,167 @@ async def admin_request_otp(platform: str, current_user: dict = Depends(get_curr
         raise HTTPException(status_code=403, detail="Only admin can request OTP")
     
     otp = generate_otp()
-    otp_storage[platform] = {"otp": otp, "created_at": datetime.now(timezone.utc)}
+    await otp_store.put(platform, otp)
     
     return {"message": "OTP sent", "mock_otp": otp}
 
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can view index usage")
+    
+    return await check_indexes(db)
+
+@api_router.get("/admin/export/{collection}")
+async def export_collection(collection: str, format: str = "ndjson", current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can export data")
+    
+    if collection not in ("bookings", "services"):
+        raise HTTPException(status_code=404, detail="Unknown export")
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+    
+    return StreamingResponse(
+        stream_export(db, collection, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{format}"'}
+    )
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can view cache statistics")
+    
+    return {
+        "discovery": discovery_cache.stats(),
+        "service_detail": service_detail_cache.stats(),
+        "tokens": token_cache.stats(),
+        "profiles": profile_cache.stats(),
+        "leaderboards": service_leaderboards.stats()
+    }
+
+@api_router.get("/admin/hashing-stats")
+async def get_hashing_stats(current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can view hashing statistics")
+    
+    return password_hasher.stats()
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(limit: int = Query(20, ge=1, le=200), current_user: dict = Depends(get_current_user)):
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can view slow queries")
+    
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "dropped": slow_query_log.dropped,
+        "queries": await slow_query_log.top(db, limit)
+    }
+
 @api_router.get("/admin/social-media")
-async def get_social_media():
+async def get_social_media(request: Request):
     settings = await db.settings.find_one({"type": "social_media"}, {"_id": 0})
-    if not settings:
-        return {"links": {}}
-    return settings
+    return conditional_response(request, JSONBody(settings or {"links": {}}), SHARED_CACHE_CONTROL)
 
 # ============= Districts & Categories =============
 
+# Fixed reference lists, serialized once when the module loads
+DISTRICTS_BODY = JSONBody({
+    "districts": [
+        "Ariyalur", "Chengalpattu", "Chennai", "Coimbatore", "Cuddalore", "Dharmapuri",
+        "Dindigul", "Erode", "Kallakurichi", "Kanchipuram", "Kanyakumari", "Karur", "Krishnagiri",
+        "Madurai", "Mayiladuthurai", "Nagapattinam", "Namakkal", "Nilgiris", "Perambalur",
+        "Pudukkottai", "Ramanathapuram", "Ranipet", "Salem", "Sivaganga", "Tenkasi",
+        "Thanjavur", "Theni", "Thoothukudi", "Tiruchirappalli", "Tirunelveli", "Tirupathur",
+        "Tiruppur", "Tiruvallur", "Tiruvannamalai", "Tiruvarur", "Vellore", "Viluppuram", 
+        "Virudhunagar", "Tiruvallur"
+    ]
+})
+
+CATEGORIES_BODY = JSONBody({
+    "categories": [
+        "Earth Movers",
+        "Packers and Movers",
+        "Lorry Services",
+        "Bore Well",
+        "Power Tools"
+    ]
+})
+
 @api_router.get("/districts")
-async def get_districts():
-    return {
-        "districts": [
-            "Ariyalur", "Chengalpattu", "Chennai", "Coimbatore", "Cuddalore", "Dharmapuri",
-            "Dindigul", "Erode", "Kallakurichi", "Kanchipuram", "Kanyakumari", "Karur", "Krishnagiri",
-            "Madurai", "Mayiladuthurai", "Nagapattinam", "Namakkal", "Nilgiris", "Perambalur",
-            "Pudukkottai", "Ramanathapuram", "Ranipet", "Salem", "Sivaganga", "Tenkasi",
-            "Thanjavur", "Theni", "Thoothukudi", "Tiruchirappalli", "Tirunelveli", "Tirupathur",
-            "Tiruppur", "Tiruvallur", "Tiruvannamalai", "Tiruvarur", "Vellore", "Viluppuram", 
-            "Virudhunagar", "Tiruvallur"
-        ]
-    }
+async def get_districts(request: Request):
+    return conditional_response(request, DISTRICTS_BODY, STATIC_CACHE_CONTROL)
 
 @api_router.get("/categories")
-async def get_categories():
-    return {
-        "categories": [
-            "Earth Movers",
-            "Packers and Movers",
-            "Lorry Services",
-            "Bore Well",
-            "Power Tools"
-        ]
-    }
+async def get_categories(request: Request):
+    return conditional_response(request, CATEGORIES_BODY, STATIC_CACHE_CONTROL)
 
 app.include_router(api_router)
 
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is serving requests. Does not touch Mongo."""
+    return json_response({
+        "status": "ok",
+        "uptime_seconds": round(time.time() - STARTED_AT, 1),
+        "pool": pool_listener.stats()
+    })
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: Mongo answers a ping. Startup warmup has always finished by the time this is served."""
+    report = {"ready": True, "pool": pool_listener.stats()}
+    try:
+        report["mongo_ping_ms"] = round(await asyncio.wait_for(ping_mongo(), READINESS_TIMEOUT_SECONDS), 2)
+    except Exception as e:
+        report["ready"] = False
+        report["error"] = str(e) or type(e).__name__
+    return json_response(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+register_collector(
+    "app_cache_stat", "Query cache sizes and counters.", ("cache", "stat"),
+    lambda: {
+        (name, stat): value
+        for name, cache in (
+            ("discovery", discovery_cache),
+            ("service_detail", service_detail_cache),
+            ("tokens", token_cache),
+            ("profiles", profile_cache)
+        )
+        for stat, value in cache.stats().items()
+    }
+)
+register_collector(
+    "mongo_pool_stat", "Mongo connection pool occupancy.", ("stat",),
+    lambda: {(stat,): value for stat, value in pool_listener.stats().items()}
+)
+register_collector(
+    "password_hasher_stat", "bcrypt thread pool activity.", ("stat",),
+    lambda: {(stat,): value for stat, value in password_hasher.stats().items()}
+)
+
+# Compress responses above GZIP_MIN_SIZE bytes; level 5 keeps most of level 9's ratio at a fraction of the CPU
+GZIP_MIN_SIZE = int(os.getenv('GZIP_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '5'))
+class StreamingGZipMiddleware(GZipMiddleware):
+    """GZip that leaves event streams alone, since the compressor would hold events back."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and any(
+            name == b"accept" and b"text/event-stream" in value for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(StreamingGZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -756,12 +1579,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency covers compression and CORS handling too
+app.add_middleware(MetricsMiddleware, router=app.router)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+READINESS_TIMEOUT_SECONDS = float(os.getenv('READINESS_TIMEOUT_SECONDS', '2'))
+STARTED_AT = time.time()
+
+async def ping_mongo() -> float:
+    """Round trip to Mongo in milliseconds."""
+    start = time.perf_counter()
+    await db.command("ping")
+    return (time.perf_counter() - start) * 1000
+
+async def warm_pool():
+    # Concurrent pings make the driver open minPoolSize connections now instead of on first traffic
+    await asyncio.gather(*(ping_mongo() for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    logger.info("Mongo pool warmed: %s", pool_listener.stats())
+
+async def start_services():
+    await warm_pool()
+    await slow_query_log.start(db)
+    await event_broker.start(db)
+    await ensure_indexes(db)
+    if event_broker.shared:
+        profiles = await service_sync.enter_async_context(event_broker.subscribe(USERS_CHANNEL))
+        service_sync.callback(asyncio.create_task(follow_profile_changes(profiles)).cancel)
+    if not LOCAL_SERVICE_COPIES:
+        # Other workers' changes would never reach these copies, so none are built
+        logger.warning("Several workers without a shared EVENT_BROKER: serving search, facets and listings from Mongo")
+        return
+    # Subscribe before building so no change lands between the build and the subscription
+    subscription = None
+    if event_broker.shared:
+        subscription = await service_sync.enter_async_context(event_broker.subscribe(SERVICES_CHANNEL))
+    await service_index.build(db)
+    logger.info("Search index built with %d services", len(service_index))
+    await service_facets.build(db)
+    await service_leaderboards.build(db)
+    logger.info("Leaderboards built: %s", service_leaderboards.stats())
+    if subscription:
+        service_sync.callback(asyncio.create_task(follow_service_changes(subscription)).cancel)
+
+async def stop_services():
+    await service_sync.aclose()
+    await slow_query_log.stop()
+    await event_broker.stop()
+    client.close()
+    password_hasher.shutdown()
\ No newline at end of file
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG_BYTES = int(os.getenv('SLOW_QUERY_LOG_BYTES', str(16 * 1024 * 1024)))
+SLOW_QUERY_COLLECTION = "slow_queries"
+# A shape is explained at most once per this many seconds
+EXPLAIN_INTERVAL_SECONDS = 600
+
+# Commands that can be explained, and where their filter lives
+FILTER_FIELDS = {
+    "find": lambda cmd: cmd.get("filter", {}),
+    "count": lambda cmd: cmd.get("query", {}),
+    "distinct": lambda cmd: cmd.get("query", {}),
+    "findAndModify": lambda cmd: cmd.get("query", {}),
+    "update": lambda cmd: (cmd.get("updates") or [{}])[0].get("q", {}),
+    "delete": lambda cmd: (cmd.get("deletes") or [{}])[0].get("q", {}),
+    "aggregate": lambda cmd: [{stage: _shape(spec) for stage, spec in s.items()} for s in cmd.get("pipeline", [])],
+}
+
+# Session and cluster bookkeeping that explain rejects or does not need
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+
+def _shape(value):
+    """Replace literal values with "?" so queries differing only in values group together."""
+    if isinstance(value, dict):
+        return {key: _shape(v) for key, v in value.items()}
+    if isinstance(value, list):
+        if value and isinstance(value[0], dict):
+            return [_shape(v) for v in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def _plan_stages(explain: dict) -> List[str]:
+    stages = []
+
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if in_plan and key == "stage" and isinstance(value, str):
+                    stages.append(value)
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain, False)
+    return stages
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Records Mongo commands slower than a threshold, with their query plan, in a capped collection.
+
+    The listener runs on driver threads, so it only captures timings and hands slow commands
+    to a task on the event loop, which runs explain and writes the record.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS):
+        self.threshold_ms = threshold_ms
+        self._pending: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._explained: Dict[str, tuple] = {}
+        self.dropped = 0
+
+    # ----- driver thread side -----
+
+    def started(self, event):
+        if self._loop is None or event.command_name not in FILTER_FIELDS:
+            return
+        collection = event.command.get(event.command_name)
+        if collection == SLOW_QUERY_COLLECTION:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.database_name, dict(event.command))
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None or event.duration_micros / 1000 < self.threshold_ms:
+            return
+        database, command = pending
+        loop = self._loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._enqueue, (database, event.command_name, command, event.duration_micros / 1000))
+
+    def _enqueue(self, item):
+        if self._queue.full():
+            self.dropped += 1
+            return
+        self._queue.put_nowait(item)
+
+    # ----- event loop side -----
+
+    async def start(self, db):
+        try:
+            await db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_BYTES)
+        except CollectionInvalid:
+            pass
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=1000)
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        self._loop = None
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self, db):
+        while True:
+            database, command_name, command, duration_ms = await self._queue.get()
+            try:
+                await self._record(db, database, command_name, command, duration_ms)
+            except Exception:
+                logger.exception("Failed to record slow %s", command_name)
+
+    async def _explain(self, db, database: str, shape_key: str, command: dict) -> dict:
+        cached = self._explained.get(shape_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        explainable = {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+        try:
+            explain = await db.client[database].command({"explain": explainable, "verbosity": "queryPlanner"})
+            stages = _plan_stages(explain)
+            plan = {"stages": stages, "collscan": "COLLSCAN" in stages}
+        except Exception as e:
+            plan = {"error": str(e)}
+        self._explained[shape_key] = (time.monotonic() + EXPLAIN_INTERVAL_SECONDS, plan)
+        return plan
+
+    async def _record(self, db, database: str, command_name: str, command: dict, duration_ms: float):
+        collection = command.get(command_name)
+        shape = FILTER_FIELDS[command_name](command)
+        shape = shape if command_name == "aggregate" else _shape(shape)
+        shape_key = json.dumps([collection, command_name, shape], sort_keys=True, default=str)
+        plan = await self._explain(db, database, shape_key, command)
+
+        await db[SLOW_QUERY_COLLECTION].insert_one({
+            "collection": collection,
+            "command": command_name,
+            "shape": shape_key,
+            "duration_ms": round(duration_ms, 2),
+            "plan": plan,
+            "collscan": plan.get("collscan", False),
+            "recorded_at": datetime.now(timezone.utc)
+        })
+
+    async def top(self, db, limit: int = 20) -> list:
+        """Query shapes ranked by total time spent, slowest first."""
+        return await db[SLOW_QUERY_COLLECTION].aggregate([
+            {"$group": {
+                "_id": "$shape",
+                "collection": {"$first": "$collection"},
+                "command": {"$first": "$command"},
+                "count": {"$sum": 1},
+                "total_ms": {"$sum": "$duration_ms"},
+                "avg_ms": {"$avg": "$duration_ms"},
+                "max_ms": {"$max": "$duration_ms"},
+                "collscan": {"$max": "$collscan"},
+                "plan": {"$last": "$plan"},
+                "last_seen": {"$max": "$recorded_at"}
+            }},
+            {"$sort": {"total_ms": -1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "shape": "$_id", "collection": 1, "command": 1, "count": 1,
+                          "total_ms": 1, "avg_ms": 1, "max_ms": 1, "collscan": 1, "plan": 1, "last_seen": 1}}
+        ]).to_list(limit)
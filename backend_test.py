@@ -424,11 +424,26 @@ class ServiceMarketplaceAPITester:
             use_token="user"
         )
         
-        # Get cart_id for removal test
-        if success2 and response and len(response) > 0:
-            self.cart_id = response[0].get('cart_id')
-            
-        return success1 and success2
+        # Get cart_id for removal test and check the summary matches the items
+        success3 = False
+        if success2 and response and response.get('items'):
+            items = response['items']
+            summary = response.get('summary', {})
+            self.cart_id = items[0].get('cart_id')
+            priced = [item for item in items if item.get('service')]
+            expected_total = round(sum(item['total_amount'] for item in priced), 2)
+            success3 = (
+                summary.get('item_count') == len(items)
+                and summary.get('unavailable_count') == len(items) - len(priced)
+                and abs(summary.get('total_amount', -1) - expected_total) < 0.01
+                and abs(summary.get('subtotal', 0) - summary.get('discount', 0) - summary.get('total_amount', 0)) < 0.01
+            )
+            if success3:
+                print(f"   Cart Total: {summary['total_amount']} ({summary['item_count']} items)")
+            else:
+                print(f"❌ Cart summary does not match items: {summary}")
+
+        return success1 and success2 and success3
 
     def test_booking_operations(self):
         """Test booking functionality"""
@@ -0,0 +1,61 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+const EVENT_TYPES = ['booking.created', 'booking.status', 'payment.verified'];
+const RECONNECT_DELAY_MS = 5000;
+
+// Calls onEvent with each booking change pushed by the server, so pages refetch only when
+// something changed. EventSource cannot send headers, so each connection asks for a
+// short-lived stream ticket and puts that in the query string instead of the token.
+export function useBookingEvents(onEvent) {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => {
+    if (!localStorage.getItem('token') || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+    let source = null;
+    let retry = null;
+    let closed = false;
+    const listener = (message) => handler.current(JSON.parse(message.data));
+
+    const reconnectLater = () => {
+      if (!closed) {
+        retry = setTimeout(connect, RECONNECT_DELAY_MS);
+      }
+    };
+
+    async function connect() {
+      let ticket;
+      try {
+        const response = await axios.post(`${API}/events/ticket`);
+        ticket = response.data.ticket;
+      } catch (error) {
+        reconnectLater();
+        return;
+      }
+      if (closed) {
+        return;
+      }
+      source = new EventSource(`${API}/events?ticket=${encodeURIComponent(ticket)}`);
+      EVENT_TYPES.forEach((type) => source.addEventListener(type, listener));
+      // The browser would reconnect with the same ticket, which expires; start over with a new one
+      source.onerror = () => {
+        source.close();
+        reconnectLater();
+      };
+    }
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (source) {
+        source.close();
+      }
+    };
+  }, []);
+}
@@ -5,6 +5,7 @@ import axios from 'axios';
 import { toast } from 'sonner';
 import { useLanguage } from '../contexts/LanguageContext';
 import { Navbar } from '../components/Navbar';
+import { useBookingEvents } from '../hooks/use-booking-events';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
 import { CheckCircle, Clock, Package } from 'lucide-react';
@@ -24,6 +25,12 @@ const BookingStatus = () => {
     }
   }, [bookingId]);
 
+  useBookingEvents((event) => {
+    if (event.booking_id === bookingId) {
+      fetchBooking();
+    }
+  });
+
   const fetchBooking = async () => {
     try {
       const response = await axios.get(`${API}/bookings/${bookingId}`);
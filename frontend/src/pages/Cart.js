@@ -16,6 +16,7 @@ const Cart = () => {
   const navigate = useNavigate();
   const { t } = useLanguage();
   const [cart, setCart] = useState([]);
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -25,7 +26,8 @@ const Cart = () => {
   const fetchCart = async () => {
     try {
       const response = await axios.get(`${API}/cart`);
-      setCart(response.data);
+      setCart(response.data.items);
+      setSummary(response.data.summary);
     } catch (error) {
       toast.error('Failed to fetch cart');
     } finally {
@@ -43,8 +45,6 @@ const Cart = () => {
     }
   };
 
-  const totalAmount = cart.reduce((sum, item) => sum + (item.total_amount || 0), 0);
-
   return (
     <div className="min-h-screen bg-background">
       <Navbar />
@@ -121,11 +121,17 @@ const Cart = () => {
                   <CardContent className="space-y-4">
                     <div className="flex justify-between">
                       <span>Items:</span>
-                      <span>{cart.length}</span>
+                      <span>{summary?.item_count}</span>
                     </div>
+                    {summary?.discount > 0 && (
+                      <div className="flex justify-between text-green-600">
+                        <span>Discount:</span>
+                        <span>-₹{summary.discount.toFixed(2)}</span>
+                      </div>
+                    )}
                     <div className="border-t pt-4 flex justify-between text-lg font-bold">
                       <span>Total:</span>
-                      <span className="text-primary">₹{totalAmount.toFixed(2)}</span>
+                      <span className="text-primary">₹{(summary?.total_amount || 0).toFixed(2)}</span>
                     </div>
                   </CardContent>
                   <CardFooter>
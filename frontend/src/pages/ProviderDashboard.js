@@ -5,6 +5,7 @@ import { toast } from 'sonner';
 import { useAuth } from '../contexts/AuthContext';
 import { useLanguage } from '../contexts/LanguageContext';
 import { Navbar } from '../components/Navbar';
+import { useBookingEvents } from '../hooks/use-booking-events';
 import { Footer } from '../components/Footer';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
@@ -23,6 +24,7 @@ const ProviderDashboard = () => {
   const { t } = useLanguage();
   const [services, setServices] = useState([]);
   const [bookings, setBookings] = useState([]);
+  const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [categories, setCategories] = useState([]);
@@ -38,9 +40,15 @@ const ProviderDashboard = () => {
   useEffect(() => {
     fetchServices();
     fetchBookings();
+    fetchStats();
     fetchCategories();
   }, []);
 
+  useBookingEvents(() => {
+    fetchBookings();
+    fetchStats();
+  });
+
   const fetchCategories = async () => {
     try {
       const response = await axios.get(`${API}/categories`);
@@ -70,6 +78,15 @@ const ProviderDashboard = () => {
     }
   };
 
+  const fetchStats = async () => {
+    try {
+      const response = await axios.get(`${API}/providers/stats`);
+      setStats(response.data);
+    } catch (error) {
+      console.error('Failed to fetch stats');
+    }
+  };
+
   const handleAddService = async (e) => {
     e.preventDefault();
     try {
@@ -113,6 +130,25 @@ const ProviderDashboard = () => {
             </div>
           </div>
 
+          {/* Stats */}
+          {stats && (
+            <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-8" data-testid="provider-stats">
+              {[
+                ['Pending requests', stats.bookings.pending + stats.bookings.in_progress],
+                ['Completed this month', stats.completed_this_month],
+                ['Earned', `₹${stats.revenue.total.toFixed(2)}`],
+                ['Pending revenue', `₹${stats.revenue.pending.toFixed(2)}`],
+              ].map(([label, value]) => (
+                <Card key={label}>
+                  <CardContent className="pt-6">
+                    <p className="text-sm text-muted-foreground">{label}</p>
+                    <p className="text-2xl font-bold">{value}</p>
+                  </CardContent>
+                </Card>
+              ))}
+            </div>
+          )}
+
           {/* My Services */}
           <Card className="mb-8">
             <CardHeader>
@@ -103,8 +103,8 @@ const ServiceDetail = () => {
                   <CardTitle className="text-3xl mb-2">{service.name}</CardTitle>
                   <div className="flex items-center gap-1 text-muted-foreground">
                     <Star className="h-5 w-5 fill-yellow-400 text-yellow-400" />
-                    <span className="font-semibold">{service.rating}</span>
-                    <span className="text-sm">Google Rating</span>
+                    <span className="font-semibold">{service.rating ?? 'New'}</span>
+                    <span className="text-sm">({service.rating_count || 0} reviews)</span>
                   </div>
                 </div>
               </div>
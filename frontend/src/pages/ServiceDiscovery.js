@@ -207,7 +207,7 @@ const ServiceDiscovery = () => {
                             />
                           ))}
                         </div>
-                        <span className="text-sm font-bold text-foreground">{service.rating}/5</span>
+                        <span className="text-sm font-bold text-foreground">{service.rating != null ? `${service.rating}/5` : 'New'}</span>
                         <Award className="h-4 w-4 text-yellow-500" />
                       </div>
                     </CardHeader>
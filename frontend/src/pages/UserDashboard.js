@@ -6,6 +6,7 @@ import { toast } from 'sonner';
 import { useAuth } from '../contexts/AuthContext';
 import { useLanguage } from '../contexts/LanguageContext';
 import { Navbar } from '../components/Navbar';
+import { useBookingEvents } from '../hooks/use-booking-events';
 import { Footer } from '../components/Footer';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
@@ -25,6 +26,8 @@ const UserDashboard = () => {
     fetchBookings();
   }, []);
 
+  useBookingEvents(() => fetchBookings());
+
   const fetchBookings = async () => {
     try {
       const response = await axios.get(`${API}/bookings`);
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Async load generator for the marketplace API.
+
+Virtual users replay realistic journeys against a running server and the run ends with
+per-route latency percentiles, throughput and error rates:
+
+    python load_test.py --concurrency 50 --duration 60 --output report.json
+    python load_test.py --concurrency 50 --duration 60 --compare report.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+DISTRICTS = ["Chennai", "Coimbatore", "Madurai", "Salem", "Tiruchirappalli", "Tirunelveli", "Vellore"]
+CATEGORIES = ["Earth Movers", "Packers and Movers", "Lorry Services", "Bore Well", "Power Tools"]
+KEYWORDS = ["jcb", "water", "truck", "shifting", "drilling", "rental"]
+PASSWORD = "Loadtest@123"
+
+# Relative weight of each journey in the traffic mix
+JOURNEY_WEIGHTS = {
+    "browse": 6,
+    "customer": 3,
+    "provider": 1,
+}
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+class Stats:
+    """Latencies and errors per route, keyed by a templated route name."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.journeys = defaultdict(int)
+        self.failed_journeys = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class VirtualUser:
+    _counter = itertools.count()
+
+    def __init__(self, http: httpx.AsyncClient, stats: Stats, run_id: str):
+        self.http = http
+        self.stats = stats
+        self.run_id = run_id
+
+    async def call(self, route: str, method: str, path: str, expected: int = 200, **kwargs) -> dict:
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(route, time.perf_counter() - start, False)
+            raise JourneyFailed(route)
+        ok = response.status_code == expected
+        self.stats.record(route, time.perf_counter() - start, ok)
+        if not ok:
+            raise JourneyFailed(route)
+        return response.json() if response.content else {}
+
+    async def register_and_login(self, role: str) -> dict:
+        n = next(self._counter)
+        email = f"lt-{self.run_id}-{n}@example.com"
+        phone = f"+7{int(self.run_id, 16) % 10**6:06d}{n:07d}"
+        registered = await self.call("POST /auth/register", "POST", "/auth/register", json={
+            "name": f"Load Test {role} {n}",
+            "email": email,
+            "phone": phone,
+            "password": PASSWORD,
+            "pin": "1234",
+            "pin_confirm": "1234",
+            "role": role
+        })
+        await self.call("POST /auth/verify-otp", "POST", "/auth/verify-otp", json={
+            "contact": email, "otp": registered['mock_otp']
+        })
+        login = await self.call("POST /auth/login", "POST", "/auth/login", json={
+            "email_or_phone": email, "password": PASSWORD, "login_type": "password"
+        })
+        return {"Authorization": f"Bearer {login['token']}"}
+
+    async def search(self) -> list:
+        params = {"district": random.choice(DISTRICTS)}
+        if random.random() < 0.6:
+            params["category"] = random.choice(CATEGORIES)
+        if random.random() < 0.3:
+            params["keyword"] = random.choice(KEYWORDS)
+        return await self.call("GET /services", "GET", "/services", params=params)
+
+    async def browse(self):
+        await self.call("GET /districts", "GET", "/districts")
+        await self.call("GET /categories", "GET", "/categories")
+        services = await self.search()
+        for service in random.sample(services, min(2, len(services))):
+            await self.call("GET /services/{id}", "GET", f"/services/{service['service_id']}")
+
+    async def customer(self):
+        headers = await self.register_and_login("user")
+        services = await self.search()
+        if not services:
+            return
+        service = random.choice(services)
+        await self.call("GET /services/{id}", "GET", f"/services/{service['service_id']}")
+        await self.call("POST /cart", "POST", "/cart", headers=headers, json={
+            "service_id": service['service_id'], "hours_days": random.randint(1, 8)
+        })
+        await self.call("GET /cart", "GET", "/cart", headers=headers)
+        address = await self.call("POST /addresses", "POST", "/addresses", headers=headers, json={
+            "user_name": "Load Test",
+            "street_name": "1 Main Road",
+            "city": service.get('district') or "Chennai",
+            "district": service.get('district') or "Chennai",
+            "pincode": "600001"
+        })
+        booking = await self.call("POST /bookings", "POST", "/bookings", headers=headers, json={
+            "service_id": service['service_id'],
+            "provider_id": service['provider_id'],
+            "address_id": address['address_id'],
+            "hours_days": 2,
+            "payment_method": "upi"
+        })
+        order = await self.call("POST /payments/create-order", "POST", "/payments/create-order", headers=headers, json={
+            "booking_id": booking['booking_id'], "amount": booking['total_amount'], "payment_method": "upi"
+        })
+        await self.call("POST /payments/verify", "POST", "/payments/verify", headers=headers, params={
+            "payment_id": order['order_id'], "booking_id": booking['booking_id']
+        })
+        await self.call("GET /bookings", "GET", "/bookings", headers=headers)
+
+    async def provider(self):
+        headers = await self.register_and_login("provider")
+        category = random.choice(CATEGORIES)
+        await self.call("POST /providers/services", "POST", "/providers/services", headers=headers, json={
+            "name": f"{category} - Load Test",
+            "category": category,
+            "description": "Load test service",
+            "base_price": random.randint(800, 5000),
+            "unit": "service"
+        })
+        await self.call("GET /providers/services", "GET", "/providers/services", headers=headers)
+        await self.call("GET /bookings", "GET", "/bookings", headers=headers)
+        await self.call("GET /auth/me", "GET", "/auth/me", headers=headers)
+
+
+async def run_virtual_user(http, stats, run_id, deadline, iterations):
+    user = VirtualUser(http, stats, run_id)
+    journeys = list(JOURNEY_WEIGHTS)
+    weights = list(JOURNEY_WEIGHTS.values())
+    done = 0
+    while time.monotonic() < deadline and (iterations is None or done < iterations):
+        journey = random.choices(journeys, weights)[0]
+        stats.journeys[journey] += 1
+        try:
+            await getattr(user, journey)()
+        except JourneyFailed:
+            stats.failed_journeys[journey] += 1
+        done += 1
+
+
+def build_report(stats: Stats, args, elapsed: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(stats.latencies.items()):
+        values = sorted(latencies)
+        routes[route] = {
+            "requests": len(values),
+            "errors": stats.errors[route],
+            "error_rate": round(stats.errors[route] / len(values), 4),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "total": {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        },
+        "journeys": {
+            name: {"runs": runs, "failed": stats.failed_journeys[name]}
+            for name, runs in sorted(stats.journeys.items())
+        },
+        "routes": routes,
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"\n{'route':<32} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, result in report["routes"].items():
+        line = (
+            f"{route:<32} {result['requests']:>7} {result['error_rate'] * 100:>5.1f}% "
+            f"{result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous and previous["p95_ms"]:
+            change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.0f}%"
+        print(line)
+    total = report["total"]
+    print(f"\n📊 {total['requests']} requests, {total['throughput_rps']} req/s, {total['error_rate'] * 100:.2f}% errors")
+    for name, result in report["journeys"].items():
+        print(f"   {name}: {result['runs']} runs, {result['failed']} failed")
+
+
+async def run(args) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as http:
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            run_virtual_user(http, stats, run_id, deadline, args.iterations)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.monotonic() - start
+    return build_report(stats, args, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async load generator for the marketplace API.")
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--concurrency", type=int, default=20, help="number of virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--iterations", type=int, default=None, help="journeys per virtual user (overrides duration)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=None, help="seed for the journey mix")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="previous JSON report to compare p95 latencies against")
+    args = parser.parse_args()
+
+    if args.iterations is not None:
+        args.duration = float("inf")
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🚀 {args.concurrency} virtual users against {args.base_url}")
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.output}")
+
+    return 1 if report["total"]["error_rate"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
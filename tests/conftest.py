@@ -0,0 +1,30 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test_database"]
+
+
+@pytest.fixture
+def server(db, monkeypatch):
+    """The API module, pointed at the mock database. Importing it needs Mongo settings but no server."""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "test_database")
+    module = importlib.import_module("server")
+    monkeypatch.setattr(module, "db", db)
+    return module
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from cache import QueryCache
+
+
+def test_get_set_and_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = QueryCache(ttl=60)
+    cache.set("a", 1, ttl=-1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_load():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    cache = QueryCache()
+    results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("key") == "value"
+
+
+@pytest.mark.anyio
+async def test_cancelling_the_first_caller_leaves_followers_running():
+    async def loader():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    cache = QueryCache()
+    leader = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == "value"
+    assert leader.cancelled()
+    assert cache.get("key") == "value"
+
+
+@pytest.mark.anyio
+async def test_failed_load_is_raised_and_not_cached():
+    async def loader():
+        raise KeyError("missing")
+
+    cache = QueryCache()
+    with pytest.raises(KeyError):
+        await cache.get_or_load("key", loader)
+
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.anyio
+async def test_load_in_flight_during_invalidation_is_not_stored():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def loader():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    cache = QueryCache()
+    task = asyncio.create_task(cache.get_or_load("key", loader))
+    await started.wait()
+    cache.invalidate("key")
+    release.set()
+
+    assert await task == "stale"
+    assert cache.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_callers_after_an_invalidation_do_not_join_the_older_load():
+    release = asyncio.Event()
+    versions = iter(["old", "new"])
+
+    async def loader():
+        value = next(versions)
+        if value == "old":
+            await release.wait()
+        return value
+
+    cache = QueryCache()
+    before = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("key")
+    after = await cache.get_or_load("key", loader)
+    release.set()
+
+    assert after == "new"
+    assert await before == "old"
+    assert cache.stats()["coalesced"] == 0
+    assert cache.get("key") == "new"
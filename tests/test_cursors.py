@@ -0,0 +1,108 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from leaderboards import ServiceLeaderboards, rank
+
+
+def service(service_id, rating):
+    return {
+        "service_id": service_id,
+        "provider_id": "provider-1",
+        "district": "Chennai",
+        "category": "Bore Well",
+        "base_price": 1000.0,
+        "rating": rating,
+    }
+
+
+def raw_cursor(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def ids(services):
+    return [s["service_id"] for s in services]
+
+
+# Ties on rating and unrated services are where a keyset walk can skip or repeat entries
+RATINGS = [4.5, None, 4.5, 3.0, None, 4.5, 5.0, 3.0, None, 4.0, 4.5]
+
+
+@pytest.fixture
+async def services(server, db, monkeypatch):
+    docs = [service(f"s{i:02d}", rating) for i, rating in enumerate(RATINGS)]
+    await db.services.insert_many([dict(doc) for doc in docs])
+    # Not built, so every listing goes to Mongo
+    monkeypatch.setattr(server, "service_leaderboards", ServiceLeaderboards())
+    server.discovery_cache.clear()
+    return docs
+
+
+# ----- decoding -----
+
+def test_round_trip(server):
+    position = {"k": [4.5, "s02"]}
+    assert server.decode_cursor(server.encode_cursor(position)) == position
+    assert server.decode_cursor(server.encode_cursor({"k": [None, "s02"]})) == {"k": [None, "s02"]}
+    assert server.decode_cursor(server.encode_cursor({"o": 20})) == {"o": 20}
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor("a string"),
+    raw_cursor([4.5, "s02"]),
+    raw_cursor({}),
+    raw_cursor({"k": [4.5]}),
+    raw_cursor({"k": [4.5, "s02", "extra"]}),
+    raw_cursor({"k": ["4.5", "s02"]}),
+    raw_cursor({"k": [True, "s02"]}),
+    raw_cursor({"k": [4.5, 2]}),
+    raw_cursor({"k": {"rating": 4.5}}),
+    raw_cursor({"o": -1}),
+    raw_cursor({"o": "10"}),
+    raw_cursor({"o": False}),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),
+])
+def test_mistyped_cursors_are_rejected(server, cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+# ----- keyset pages -----
+
+@pytest.mark.anyio
+async def test_mongo_order_puts_unrated_last(server, services):
+    ordered = await server.find_services_in_mongo(None, None, None, None, None, None, 100)
+
+    assert ids(ordered) == ids(sorted(services, key=rank, reverse=True))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("position", range(len(RATINGS)))
+async def test_keyset_after_continues_the_mongo_order(server, services, position):
+    ordered = ids(await server.find_services_in_mongo(None, None, None, None, None, None, 100))
+    rating, service_id = services[position]["rating"], services[position]["service_id"]
+
+    after = await server.find_services_in_mongo(None, None, None, None, None, {"k": [rating, service_id]}, 100)
+
+    assert ids(after) == ordered[ordered.index(service_id) + 1:]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4])
+async def test_page_walk_visits_every_service_once(server, services, page_size):
+    expected = ids(await server.find_services_in_mongo(None, None, None, None, None, None, 100))
+
+    seen, cursor = [], None
+    while True:
+        page = await server.find_services(None, None, None, None, None, page_size, cursor)
+        assert len(page["services"]) <= page_size
+        seen.extend(ids(page["services"]))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
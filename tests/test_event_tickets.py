@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+USER = {"user_id": "u1", "email": "u1@example.com", "role": "user"}
+
+
+def test_ticket_opens_the_event_stream_only(server):
+    ticket = server.create_event_ticket(USER)
+
+    assert server.verify_event_ticket(ticket)["user_id"] == "u1"
+    # A leaked ticket is not an API token
+    assert server.verify_token(ticket) is None
+
+
+def test_api_token_is_not_a_ticket(server):
+    token = server.create_token("u1", "u1@example.com", "user")
+
+    assert server.verify_event_ticket(token) is None
+    assert server.verify_token(token)["user_id"] == "u1"
+
+
+def test_ticket_is_short_lived(server):
+    payload = jwt.decode(server.create_event_ticket(USER), server.JWT_SECRET, algorithms=[server.JWT_ALGORITHM])
+
+    assert payload["exp"] - time.time() <= server.EVENT_TICKET_SECONDS
+
+
+def test_expired_ticket_is_rejected(server):
+    expired = jwt.encode(
+        {**USER, "purpose": "events", "exp": int(time.time()) - 1},
+        server.JWT_SECRET,
+        algorithm=server.JWT_ALGORITHM
+    )
+    assert server.verify_event_ticket(expired) is None
+
+
+@pytest.mark.anyio
+async def test_stream_rejects_a_token_in_the_query_string(server):
+    token = server.create_token("u1", "u1@example.com", "user")
+
+    with pytest.raises(HTTPException) as error:
+        await server.stream_events(request=None, ticket=token, authorization=None)
+    assert error.value.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_ticket_endpoint_issues_a_ticket_for_the_caller(server):
+    response = await server.create_events_ticket(current_user=USER)
+
+    assert response["expires_in"] == server.EVENT_TICKET_SECONDS
+    assert server.verify_event_ticket(response["ticket"])["user_id"] == "u1"
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from idempotency import IdempotencyStore, fingerprint
+from indexes import INDEXES
+
+
+@pytest.fixture
+async def store(db):
+    await db.idempotency_keys.create_indexes(INDEXES["idempotency_keys"])
+    return IdempotencyStore(db)
+
+
+def counting_handler(response=None):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return response or {"booking_id": f"b{len(calls)}"}
+
+    return handler, calls
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+@pytest.mark.anyio
+async def test_repeat_replays_the_first_response(store):
+    handler, calls = counting_handler()
+
+    first = await store.run("bookings:u1", "key-1", {"service_id": "s1"}, handler)
+    second = await store.run("bookings:u1", "key-1", {"service_id": "s1"}, handler)
+
+    assert first == ({"booking_id": "b1"}, False)
+    assert second == ({"booking_id": "b1"}, True)
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_keys_are_scoped(store):
+    handler, calls = counting_handler()
+
+    await store.run("bookings:u1", "key-1", {}, handler)
+    await store.run("bookings:u2", "key-1", {}, handler)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.anyio
+async def test_reused_key_with_different_body_is_rejected(store):
+    handler, _ = counting_handler()
+    await store.run("bookings:u1", "key-1", {"service_id": "s1"}, handler)
+
+    with pytest.raises(HTTPException) as error:
+        await store.run("bookings:u1", "key-1", {"service_id": "s2"}, handler)
+    assert error.value.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_on_one_worker_run_once(store):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"booking_id": "b1"}
+
+    results = await asyncio.gather(*(store.run("bookings:u1", "key-1", {}, handler) for _ in range(3)))
+
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+
+
+@pytest.mark.anyio
+async def test_duplicate_on_another_worker_while_pending_gets_409(db, store):
+    other_worker = IdempotencyStore(db)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_handler():
+        started.set()
+        await release.wait()
+        return {"booking_id": "b1"}
+
+    first = asyncio.create_task(store.run("bookings:u1", "key-1", {}, slow_handler))
+    await started.wait()
+    handler, calls = counting_handler()
+    with pytest.raises(HTTPException) as error:
+        await other_worker.run("bookings:u1", "key-1", {}, handler)
+    release.set()
+
+    assert error.value.status_code == 409
+    assert calls == []
+    assert await first == ({"booking_id": "b1"}, False)
+
+
+@pytest.mark.anyio
+async def test_failed_request_releases_the_key(store):
+    async def failing_handler():
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    with pytest.raises(HTTPException):
+        await store.run("bookings:u1", "key-1", {}, failing_handler)
+
+    handler, calls = counting_handler()
+    assert await store.run("bookings:u1", "key-1", {}, handler) == ({"booking_id": "b1"}, False)
+
+
+@pytest.mark.anyio
+async def test_expired_key_is_taken_over(db, store):
+    await db.idempotency_keys.insert_one({
+        "key": "bookings:u1:key-1",
+        "request_hash": fingerprint({"old": True}),
+        "status": "completed",
+        "response": {"booking_id": "old"},
+        "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)
+    })
+    handler, _ = counting_handler()
+
+    assert await store.run("bookings:u1", "key-1", {}, handler) == ({"booking_id": "b1"}, False)
+    assert await db.idempotency_keys.count_documents({}) == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("key", ["", "k" * 256])
+async def test_key_length_is_checked(store, key):
+    handler, _ = counting_handler()
+    with pytest.raises(HTTPException) as error:
+        await store.run("bookings:u1", key, {}, handler)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_claim_left_by_a_crashed_worker_is_taken_over_after_its_lease(db, store):
+    await db.idempotency_keys.insert_one({
+        "key": "bookings:u1:key-1",
+        "request_hash": fingerprint({}),
+        "status": "pending",
+        "response": None,
+        "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)
+    })
+    handler, calls = counting_handler()
+
+    assert await store.run("bookings:u1", "key-1", {}, handler) == ({"booking_id": "b1"}, False)
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_only_completed_responses_are_kept_for_the_full_ttl(db):
+    await db.idempotency_keys.create_indexes(INDEXES["idempotency_keys"])
+    store = IdempotencyStore(db, ttl=3600, pending_ttl=30)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_handler():
+        started.set()
+        await release.wait()
+        return {"booking_id": "b1"}
+
+    task = asyncio.create_task(store.run("bookings:u1", "key-1", {}, slow_handler))
+    await started.wait()
+    pending = await db.idempotency_keys.find_one({"key": "bookings:u1:key-1"})
+    release.set()
+    await task
+    completed = await db.idempotency_keys.find_one({"key": "bookings:u1:key-1"})
+
+    now = datetime.now(timezone.utc)
+    assert pending["expires_at"].replace(tzinfo=timezone.utc) < now + timedelta(seconds=31)
+    assert completed["expires_at"].replace(tzinfo=timezone.utc) > now + timedelta(seconds=3500)
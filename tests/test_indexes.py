@@ -0,0 +1,48 @@
+import pytest
+
+from indexes import IndexBuildError, ensure_indexes, merge_duplicate_cart_lines
+
+
+def cart_line(cart_id, user_id, service_id, hours_days, added_at):
+    return {"cart_id": cart_id, "user_id": user_id, "service_id": service_id, "hours_days": hours_days, "added_at": added_at}
+
+
+@pytest.mark.anyio
+async def test_duplicate_cart_lines_are_merged_into_the_earliest(db):
+    await db.cart.insert_many([
+        cart_line("c2", "u1", "s1", 2.0, "2026-01-02"),
+        cart_line("c1", "u1", "s1", 1.0, "2026-01-01"),
+        cart_line("c3", "u1", "s1", 4.0, "2026-01-03"),
+        cart_line("c4", "u1", "s2", 1.0, "2026-01-01"),
+        cart_line("c5", "u2", "s1", 3.0, "2026-01-01"),
+    ])
+
+    assert await merge_duplicate_cart_lines(db) == 2
+
+    lines = {line["cart_id"]: line["hours_days"] async for line in db.cart.find({}, {"_id": 0})}
+    assert lines == {"c1": 7.0, "c4": 1.0, "c5": 3.0}
+
+
+@pytest.mark.anyio
+async def test_ensure_indexes_builds_the_unique_cart_index_over_old_duplicates(db):
+    await db.cart.insert_many([
+        cart_line("c1", "u1", "s1", 1.0, "2026-01-01"),
+        cart_line("c2", "u1", "s1", 2.0, "2026-01-02"),
+    ])
+
+    await ensure_indexes(db)
+
+    names = [index["name"] async for index in db.cart.list_indexes()]
+    assert "user_id_service_id_unique" in names
+    assert await merge_duplicate_cart_lines(db) == 0
+
+
+@pytest.mark.anyio
+async def test_duplicate_users_stop_ensure_indexes(db):
+    await db.users.insert_many([
+        {"user_id": "u1", "email": "same@example.com", "phone": "1"},
+        {"user_id": "u2", "email": "same@example.com", "phone": "2"},
+    ])
+
+    with pytest.raises(IndexBuildError, match="users.email_unique"):
+        await ensure_indexes(db)
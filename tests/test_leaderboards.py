@@ -0,0 +1,253 @@
+import random
+
+import pytest
+
+from leaderboards import Bucket, ServiceLeaderboards, cursor_rank, rank
+
+DISTRICTS = ["Chennai", "Madurai", "Salem", None]
+CATEGORIES = ["Bore Well", "Power Tools", "Lorry Services"]
+
+
+def service(service_id, rating=None, district="Chennai", category="Bore Well", base_price=1000.0):
+    return {
+        "service_id": service_id,
+        "provider_id": "provider-1",
+        "district": district,
+        "category": category,
+        "base_price": base_price,
+        "rating": rating,
+    }
+
+
+def ids(services):
+    return [s["service_id"] for s in services]
+
+
+# ----- ranking -----
+
+def test_rank_orders_by_rating_then_service_id_with_unrated_last():
+    services = [service("a", 4.5), service("b", None), service("c", 4.5), service("d", 5.0), service("e", None)]
+    assert ids(sorted(services, key=rank, reverse=True)) == ["d", "c", "a", "e", "b"]
+
+
+def test_cursor_rank_matches_rank():
+    assert cursor_rank(4.5, "a") == rank(service("a", 4.5))
+    assert cursor_rank(None, "a") == rank(service("a"))
+
+
+def test_complete_bucket_has_no_floor():
+    assert Bucket([service("a", 4.0)], complete=True).floor() is None
+
+
+def test_truncated_bucket_floor_is_its_last_entry():
+    bucket = Bucket([service("b", 5.0), service("a", 4.0)], complete=False)
+    assert bucket.floor() == rank(service("a", 4.0))
+
+
+def test_empty_truncated_bucket_vouches_for_nothing():
+    floor = Bucket([], complete=False).floor()
+    assert rank(service("z", 5.0)) < floor
+
+
+@pytest.mark.anyio
+async def test_build_keeps_the_top_of_each_bucket(db):
+    await db.services.insert_many(
+        [service(f"s{i}", rating=4.0) for i in range(6)]
+        + [service("u", None), service("m", 4.5, district="Madurai")]
+    )
+    leaderboards = ServiceLeaderboards(size=3)
+    await leaderboards.build(db)
+
+    assert len(leaderboards) == 4
+    assert ids(leaderboards._buckets[("Chennai", "Bore Well")].services) == ["s5", "s4", "s3"]
+    assert not leaderboards._buckets[("Chennai", "Bore Well")].complete
+    assert leaderboards._buckets[("Madurai", "Bore Well")].complete
+
+
+# ----- queries -----
+
+@pytest.mark.anyio
+async def test_query_within_horizon_is_answered(db):
+    await db.services.insert_many([service(f"s{i}", rating=i / 2) for i in range(10)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    assert ids(leaderboards.query("Chennai", None, None, None, None, 3)) == ["s9", "s8", "s7"]
+    assert ids(leaderboards.query(None, None, None, None, cursor_rank(4.0, "s8"), 2)) == ["s7", "s6"]
+
+
+@pytest.mark.anyio
+async def test_query_past_a_truncated_bucket_falls_back(db):
+    await db.services.insert_many([service(f"s{i}", rating=i / 2) for i in range(10)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    assert leaderboards.query("Chennai", None, None, None, None, 5) is None
+    # A price filter that leaves too few services above the floor can't be answered either
+    assert leaderboards.query(None, None, 5000.0, None, None, 1) is None
+
+
+@pytest.mark.anyio
+async def test_complete_buckets_answer_every_page(db):
+    await db.services.insert_many([service(f"s{i}", rating=4.0) for i in range(3)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    assert ids(leaderboards.query(None, None, None, None, None, 10)) == ["s2", "s1", "s0"]
+    assert leaderboards.query(None, None, 5000.0, None, None, 10) == []
+
+
+@pytest.mark.anyio
+async def test_regex_filters_are_not_served(db):
+    await db.services.insert_many([service("s1", 4.0)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    assert leaderboards.query("Chen.*", None, None, None, None, 10) is None
+    assert ids(leaderboards.query("chen", None, None, None, None, 10)) == ["s1"]
+
+
+@pytest.mark.anyio
+async def test_empty_filters_mean_no_filter(db):
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0, district=None, category=None)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    assert ids(leaderboards.query("", "", None, None, None, 10)) == ["a", "b"]
+
+
+@pytest.mark.anyio
+async def test_listing_with_empty_district_keeps_services_without_one(server, db, monkeypatch):
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0, district=None)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+    monkeypatch.setattr(server, "service_leaderboards", leaderboards)
+
+    services = await server.find_services("", None, None, None, None, None, None)
+
+    assert ids(services) == ["a", "b"]
+
+
+# ----- maintenance -----
+
+@pytest.mark.anyio
+async def test_insert_below_truncated_floor_is_skipped(db):
+    await db.services.insert_many([service(f"s{i}", rating=4.0 + i / 10) for i in range(6)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    await leaderboards.upsert(db, service("low", 1.0))
+    assert leaderboards.get("low") is None
+
+    await leaderboards.upsert(db, service("high", 5.0))
+    assert ids(leaderboards.query("Chennai", None, None, None, None, 4)) == ["high", "s5", "s4", "s3"]
+    assert len(leaderboards) == 4
+
+
+@pytest.mark.anyio
+async def test_rerated_service_moves(db):
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    await leaderboards.upsert(db, service("b", 5.0))
+    assert ids(leaderboards.query(None, None, None, None, None, 2)) == ["b", "a"]
+
+
+@pytest.mark.anyio
+async def test_truncated_bucket_refills_after_removals(db):
+    await db.services.insert_many([service(f"s{i}", rating=i / 10) for i in range(10)])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    for service_id in ["s9", "s8", "s7"]:
+        await db.services.delete_one({"service_id": service_id})
+        await leaderboards.remove(db, service_id)
+
+    assert leaderboards.stats()["refills"] == 1
+    assert ids(leaderboards.query("Chennai", None, None, None, None, 4)) == ["s6", "s5", "s4", "s3"]
+
+
+@pytest.mark.anyio
+async def test_moving_district_leaves_old_bucket(db):
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0, district="Salem")])
+    leaderboards = ServiceLeaderboards(size=4)
+    await leaderboards.build(db)
+
+    await leaderboards.upsert(db, service("a", 4.0, district="Salem"))
+    assert leaderboards.query("Chennai", None, None, None, None, 10) == []
+    assert ids(leaderboards.query("Salem", None, None, None, None, 10)) == ["a", "b"]
+
+
+# ----- equivalence with the Mongo query -----
+
+def random_service(rng, i):
+    return service(
+        f"s{i:04d}",
+        rating=rng.choice([None, round(rng.uniform(3, 5), 1)]),
+        district=rng.choice(DISTRICTS),
+        category=rng.choice(CATEGORIES),
+        base_price=float(rng.randint(800, 5000)),
+    )
+
+
+async def assert_matches_mongo(server, leaderboards, rng, queries=200):
+    served = 0
+    for _ in range(queries):
+        district = rng.choice([None, "Chennai", "chen", "madurai", "a"])
+        category = rng.choice([None, "Bore Well", "power"])
+        min_price = rng.choice([None, 2000.0])
+        max_price = rng.choice([None, 4000.0])
+        count = rng.choice([5, 13, 30])
+        position = None
+        if rng.random() < 0.5:
+            doc = await server.db.services.find_one({"service_id": f"s{rng.randrange(300):04d}"})
+            if doc:
+                position = {"k": [doc["rating"], doc["service_id"]]}
+
+        after = cursor_rank(*position["k"]) if position else None
+        got = leaderboards.query(district, category, min_price, max_price, after, count)
+        if got is None:
+            continue
+        served += 1
+        # mongomock's to_list ignores its length argument
+        expected = (await server.find_services_in_mongo(
+            district, category, None, min_price, max_price, position, count
+        ))[:count]
+        assert ids(got) == ids(expected), (district, category, min_price, max_price, position, count)
+    assert served > 0
+
+
+@pytest.mark.anyio
+async def test_results_match_mongo(server, db):
+    rng = random.Random(1)
+    await db.services.insert_many([random_service(rng, i) for i in range(300)])
+    leaderboards = ServiceLeaderboards(size=12)
+    await leaderboards.build(db)
+
+    await assert_matches_mongo(server, leaderboards, rng)
+
+
+@pytest.mark.anyio
+async def test_results_match_mongo_after_changes(server, db):
+    rng = random.Random(2)
+    await db.services.insert_many([random_service(rng, i) for i in range(300)])
+    leaderboards = ServiceLeaderboards(size=12)
+    await leaderboards.build(db)
+
+    for _ in range(200):
+        service_id = f"s{rng.randrange(300):04d}"
+        current = await db.services.find_one({"service_id": service_id}, {"_id": 0})
+        if current is None:
+            continue
+        if rng.random() < 0.1:
+            await db.services.delete_one({"service_id": service_id})
+            await leaderboards.remove(db, service_id)
+            continue
+        changes = {"rating": rng.choice([None, round(rng.uniform(3, 5), 1)]), "base_price": float(rng.randint(800, 5000))}
+        if rng.random() < 0.2:
+            changes["district"] = rng.choice(DISTRICTS)
+        await db.services.update_one({"service_id": service_id}, {"$set": changes})
+        await leaderboards.upsert(db, {**current, **changes})
+
+    await assert_matches_mongo(server, leaderboards, rng)
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from loaders import BatchLoader, RequestLoaders, fetch_by_ids
+
+
+@pytest.mark.anyio
+async def test_fetch_by_ids_keys_by_field(db):
+    await db.users.insert_many([
+        {"user_id": "u1", "name": "One", "email": "one@example.com"},
+        {"user_id": "u2", "name": "Two", "email": "two@example.com"},
+    ])
+
+    users = await fetch_by_ids(db.users, "user_id", ["u1", "u2", "u1", "missing"], {"_id": 0, "name": 1})
+
+    assert users == {"u1": {"name": "One"}, "u2": {"name": "Two"}}
+
+
+@pytest.mark.anyio
+async def test_fetch_by_ids_keeps_requested_key_field(db):
+    await db.users.insert_one({"user_id": "u1", "name": "One"})
+
+    users = await fetch_by_ids(db.users, "user_id", ["u1"], {"_id": 0, "user_id": 1, "name": 1})
+
+    assert users == {"u1": {"user_id": "u1", "name": "One"}}
+
+
+@pytest.mark.anyio
+async def test_fetch_by_ids_skips_empty_lookup(db):
+    assert await fetch_by_ids(db.users, "user_id", [], {"_id": 0}) == {}
+
+
+@pytest.mark.anyio
+async def test_loads_in_the_same_tick_share_one_batch():
+    batches = []
+
+    async def batch_fn(keys):
+        batches.append(sorted(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    loader = BatchLoader(batch_fn)
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+
+    assert results == ["A", "B", "A", None]
+    assert batches == [["a", "b", "missing"]]
+
+
+@pytest.mark.anyio
+async def test_loaded_keys_are_cached():
+    batches = []
+
+    async def batch_fn(keys):
+        batches.append(list(keys))
+        return {key: key for key in keys}
+
+    loader = BatchLoader(batch_fn)
+    loader.prime("primed", "value")
+
+    assert await loader.load_many(["a", "primed"]) == ["a", "value"]
+    assert await loader.load("a") == "a"
+    assert batches == [["a"]]
+
+
+@pytest.mark.anyio
+async def test_failed_batch_fails_its_keys_and_allows_retry():
+    calls = 0
+
+    async def batch_fn(keys):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("boom")
+        return {key: key for key in keys}
+
+    loader = BatchLoader(batch_fn)
+    with pytest.raises(RuntimeError):
+        await loader.load("a")
+
+    assert await loader.load("a") == "a"
+
+
+@pytest.mark.anyio
+async def test_request_loaders_join_services_and_users(db):
+    await db.services.insert_one({"service_id": "s1", "name": "Bore Well"})
+    await db.users.insert_one({"user_id": "u1", "name": "One", "email": "one@example.com", "phone": "1", "password": "x"})
+
+    loaders = RequestLoaders(db)
+    service, user = await asyncio.gather(loaders.services.load("s1"), loaders.users.load("u1"))
+
+    assert service == {"service_id": "s1", "name": "Bore Well"}
+    assert user == {"name": "One", "email": "one@example.com", "phone": "1"}
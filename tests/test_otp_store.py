@@ -0,0 +1,82 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import otp_store
+from otp_store import MemoryOTPStore, MongoOTPStore, create_otp_store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(otp_store.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.anyio
+async def test_memory_store_round_trip(clock):
+    store = MemoryOTPStore(ttl=60)
+    await store.put("phone:1", "123456")
+
+    assert await store.get("phone:1") == "123456"
+    await store.delete("phone:1")
+    assert await store.get("phone:1") is None
+
+
+@pytest.mark.anyio
+async def test_memory_store_sweeps_expired_entries(clock):
+    store = MemoryOTPStore(ttl=60)
+    await store.put("phone:1", "111111")
+    await store.put("phone:2", "222222")
+
+    clock[0] += 61
+    assert await store.get("phone:1") is None
+    assert len(store) == 0
+
+
+@pytest.mark.anyio
+async def test_memory_store_reissued_otp_outlives_the_old_expiry(clock):
+    store = MemoryOTPStore(ttl=60)
+    await store.put("phone:1", "111111")
+    clock[0] += 30
+    await store.put("phone:1", "222222")
+
+    # The first OTP's heap entry comes due but must not remove its replacement
+    clock[0] += 31
+    assert await store.get("phone:1") == "222222"
+    clock[0] += 30
+    assert await store.get("phone:1") is None
+
+
+@pytest.mark.anyio
+async def test_mongo_store_round_trip(db):
+    store = MongoOTPStore(db, ttl=60)
+    await store.put("phone:1", "111111")
+    await store.put("phone:1", "222222")
+
+    assert await store.get("phone:1") == "222222"
+    assert await db.otps.count_documents({}) == 1
+    await store.delete("phone:1")
+    assert await store.get("phone:1") is None
+
+
+@pytest.mark.anyio
+async def test_mongo_store_ignores_expired_entries_before_the_ttl_monitor(db):
+    store = MongoOTPStore(db, ttl=60)
+    await db.otps.insert_one({
+        "key": "phone:1",
+        "otp": "111111",
+        "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)
+    })
+
+    assert await store.get("phone:1") is None
+
+
+def test_create_otp_store_selects_backend(db, monkeypatch):
+    monkeypatch.setenv("OTP_STORE", "mongo")
+    assert isinstance(create_otp_store(db), MongoOTPStore)
+    monkeypatch.setenv("OTP_STORE", "memory")
+    assert isinstance(create_otp_store(db), MemoryOTPStore)
+    monkeypatch.setenv("OTP_STORE", "redis")
+    with pytest.raises(ValueError):
+        create_otp_store(db)
@@ -0,0 +1,130 @@
+import pytest
+
+from provider_stats import ProviderStats, period
+
+
+def booking(booking_id, status, amount=100.0, provider_id="p1", **fields):
+    return {
+        "booking_id": booking_id,
+        "provider_id": provider_id,
+        "status": status,
+        "total_amount": amount,
+        "created_at": "2026-03-01T10:00:00+00:00",
+        **fields,
+    }
+
+
+async def counted(stats, provider_id="p1"):
+    result = await stats.get(provider_id)
+    result.pop("updated_at", None)
+    result.pop("completed_this_month")
+    return result
+
+
+@pytest.mark.anyio
+async def test_unknown_provider_gets_zeroes(db):
+    stats = await ProviderStats(db).get("nobody")
+
+    assert stats["bookings"] == {"pending": 0, "in_progress": 0, "completed": 0, "cancelled": 0}
+    assert stats["revenue"] == {"total": 0.0, "pending": 0.0}
+    assert stats["completed_by_month"] == {}
+    assert stats["completed_this_month"] == 0
+
+
+@pytest.mark.anyio
+async def test_status_transitions_move_counts_and_revenue(db):
+    stats = ProviderStats(db)
+    created = booking("b1", "pending", 250.0)
+    await stats.booking_created(created)
+
+    started = {**created, "status": "in_progress"}
+    await stats.booking_changed(created, started)
+    done = {**started, "status": "completed", "completed_at": "2026-03-05T10:00:00+00:00"}
+    await stats.booking_changed(started, done)
+
+    result = await counted(stats)
+    assert result["bookings"] == {"pending": 0, "in_progress": 0, "completed": 1, "cancelled": 0}
+    assert result["revenue"] == {"total": 250.0, "pending": 0.0}
+    assert result["completed_by_month"] == {"2026-03": 1}
+
+
+@pytest.mark.anyio
+async def test_cancelling_drops_pending_revenue(db):
+    stats = ProviderStats(db)
+    created = booking("b1", "pending", 80.0)
+    await stats.booking_created(created)
+    await stats.booking_changed(created, {**created, "status": "cancelled"})
+
+    result = await counted(stats)
+    assert result["bookings"]["cancelled"] == 1
+    assert result["revenue"] == {"total": 0.0, "pending": 0.0}
+
+
+@pytest.mark.anyio
+async def test_unchanged_status_is_a_no_op(db):
+    stats = ProviderStats(db)
+    created = booking("b1", "pending")
+    await stats.booking_created(created)
+    await stats.booking_changed(created, dict(created))
+
+    assert (await counted(stats))["bookings"]["pending"] == 1
+
+
+@pytest.mark.anyio
+async def test_reopening_a_completed_booking_takes_it_out_of_its_month(db):
+    stats = ProviderStats(db)
+    done = booking("b1", "completed", 50.0, completed_at="2026-02-10T10:00:00+00:00")
+    await stats.booking_created(done)
+    await stats.booking_changed(done, {**done, "status": "in_progress"})
+
+    result = await counted(stats)
+    assert result["bookings"]["completed"] == 0
+    assert result["revenue"] == {"total": 0.0, "pending": 50.0}
+    # Months that fall back to zero are hidden
+    assert result["completed_by_month"] == {}
+
+
+@pytest.mark.anyio
+async def test_rebuild_matches_incremental_counters(db):
+    bookings = [
+        booking("b1", "pending", 100.0),
+        booking("b2", "in_progress", 200.0),
+        booking("b3", "completed", 300.0, completed_at="2026-03-05T10:00:00+00:00"),
+        booking("b4", "completed", 400.0, completed_at="2026-04-02T10:00:00+00:00"),
+        booking("b5", "cancelled", 500.0),
+        booking("b6", "pending", 600.0, provider_id="p2"),
+    ]
+    await db.bookings.insert_many([dict(b) for b in bookings])
+
+    incremental = ProviderStats(db)
+    for b in bookings:
+        created = {**b, "status": "pending"}
+        await incremental.booking_created(created)
+        await incremental.booking_changed(created, b)
+    expected = {provider_id: await counted(incremental, provider_id) for provider_id in ("p1", "p2")}
+
+    assert await ProviderStats(db).rebuild() == 2
+    for provider_id in ("p1", "p2"):
+        assert await counted(ProviderStats(db), provider_id) == expected[provider_id]
+
+
+@pytest.mark.anyio
+async def test_rebuild_dates_old_completions_by_their_last_update(db):
+    await db.bookings.insert_one(booking("b1", "completed", updated_at="2026-04-02T10:00:00+00:00"))
+
+    await ProviderStats(db).rebuild()
+
+    assert (await counted(ProviderStats(db)))["completed_by_month"] == {"2026-04": 1}
+
+
+@pytest.mark.anyio
+async def test_rebuild_removes_providers_without_bookings(db):
+    stats = ProviderStats(db)
+    await stats.booking_created(booking("b1", "pending", provider_id="gone"))
+
+    assert await stats.rebuild() == 0
+    assert await db.provider_stats.count_documents({}) == 0
+
+
+def test_period_is_the_month_of_the_timestamp():
+    assert period("2026-03-05T10:00:00+00:00") == "2026-03"
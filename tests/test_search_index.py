@@ -0,0 +1,151 @@
+import pytest
+
+from search_index import ServiceSearchIndex, tokenize
+
+
+def service(service_id, name="Service", description="", category="Bore Well", rating=None, **fields):
+    return {
+        "service_id": service_id,
+        "name": name,
+        "description": description,
+        "category": category,
+        "district": "Chennai",
+        "base_price": 1000.0,
+        "rating": rating,
+        **fields,
+    }
+
+
+def ids(services):
+    return [s["service_id"] for s in services]
+
+
+def indexed(*services):
+    index = ServiceSearchIndex()
+    for s in services:
+        index.add(s)
+    return index
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    assert tokenize("JCB-3DX, Hire!") == ["jcb", "3dx", "hire"]
+
+
+# ----- ranking -----
+
+def test_name_match_outranks_description_match():
+    index = indexed(
+        service("desc", name="Lorry", description="Pump repair"),
+        service("name", name="Pump", description="Lorry repair"),
+    )
+    assert ids(index.search("pump")) == ["name", "desc"]
+
+
+def test_shorter_document_ranks_first_for_the_same_match():
+    index = indexed(
+        service("long", name="Drill", description="heavy duty rotary hammer with extra bits"),
+        service("short", name="Drill"),
+    )
+    assert ids(index.search("drill")) == ["short", "long"]
+
+
+def test_rarer_term_weighs_more():
+    index = indexed(
+        service("rare-in-name", name="Harvester", description="tractor"),
+        service("common-in-name", name="Tractor", description="harvester"),
+        *(service(f"t{i}", name="Tractor") for i in range(3)),
+    )
+    # Same lengths and weights; the name match on the rarer term wins
+    assert ids(index.search("tractor harvester")) == ["rare-in-name", "common-in-name"]
+
+
+def test_every_query_term_must_match():
+    index = indexed(service("a", name="Bore Well Drilling"), service("b", name="Bore Pump"))
+    assert ids(index.search("bore drilling")) == ["a"]
+    assert index.search("bore crane") == []
+
+
+def test_equal_scores_are_ordered_by_rating():
+    index = indexed(service("low", name="Crane", rating=3.0), service("high", name="Crane", rating=4.5))
+    assert ids(index.search("crane")) == ["high", "low"]
+
+
+# ----- prefix expansion -----
+
+def test_query_terms_match_as_prefixes():
+    index = indexed(
+        service("a", name="Borewell", category="Drilling"),
+        service("b", name="Bore", category="Drilling"),
+        service("c", name="Boat", category="Marine"),
+    )
+    assert sorted(ids(index.search("bore"))) == ["a", "b"]
+    assert sorted(ids(index.search("bo"))) == ["a", "b", "c"]
+    assert index.search("borewells") == []
+
+
+def test_keywords_list_is_indexed():
+    index = indexed(service("a", name="Lorry", keywords=["tipper", "sand"]))
+    assert ids(index.search("tip")) == ["a"]
+
+
+# ----- filters -----
+
+def test_filters_and_limit_apply_after_scoring():
+    index = indexed(
+        service("a", name="Pump", district="Salem", base_price=500.0),
+        service("b", name="Pump", district="Chennai", base_price=2500.0),
+        service("c", name="Pump", district="Chennai", base_price=900.0),
+    )
+    assert ids(index.search("pump", district="chen", min_price=1000.0)) == ["b"]
+    assert sorted(ids(index.search("pump", max_price=1000.0))) == ["a", "c"]
+    assert len(index.search("pump", limit=1)) == 1
+
+
+# ----- bookkeeping -----
+
+def test_remove_drops_terms_only_that_service_used():
+    index = indexed(service("a", name="Crane Hire"), service("b", name="Crane"))
+    index.remove("a")
+
+    assert index.search("hire") == []
+    assert "hire" not in index._vocabulary
+    assert "hire" not in index._postings
+    assert ids(index.search("crane")) == ["b"]
+    assert len(index) == 1
+
+
+def test_removing_an_unknown_service_is_a_no_op():
+    index = indexed(service("a", name="Crane"))
+    index.remove("missing")
+    assert len(index) == 1
+
+
+def test_re_adding_replaces_the_previous_version():
+    index = indexed(service("a", name="Crane"), service("b", name="Lorry"))
+    index.add(service("a", name="Excavator"))
+
+    assert index.search("crane") == []
+    assert ids(index.search("excavator")) == ["a"]
+    assert len(index) == 2
+    # Lengths and vocabulary match an index that only ever saw the new version
+    fresh = indexed(service("b", name="Lorry"), service("a", name="Excavator"))
+    assert index._total_length == fresh._total_length
+    assert index._vocabulary == fresh._vocabulary
+
+
+def test_results_are_copies():
+    index = indexed(service("a", name="Crane"))
+    index.search("crane")[0]["name"] = "changed"
+    index.get("a")["name"] = "changed"
+    assert index.get("a")["name"] == "Crane"
+
+
+@pytest.mark.anyio
+async def test_build_indexes_the_collection(db):
+    await db.services.insert_many([service("a", name="Crane"), service("b", name="Lorry")])
+    index = ServiceSearchIndex()
+    await index.build(db)
+
+    assert index.ready
+    assert ids(index.search("lorry")) == ["b"]
+    assert "_id" not in index.get("a")
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from events import MemoryEventBroker, Subscription
+from facets import ServiceFacets
+from leaderboards import ServiceLeaderboards
+from search_index import ServiceSearchIndex
+
+
+def service(service_id, rating, district="Chennai", base_price=1000.0):
+    return {
+        "service_id": service_id,
+        "provider_id": "p1",
+        "name": f"Bore Well {service_id}",
+        "category": "Bore Well",
+        "district": district,
+        "base_price": base_price,
+        "rating": rating,
+    }
+
+
+@pytest.fixture
+async def worker(server, db, monkeypatch):
+    """This worker's in-memory copies, built from the database, following a subscription."""
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0)])
+    for name, copy in (
+        ("service_index", ServiceSearchIndex()),
+        ("service_facets", ServiceFacets()),
+        ("service_leaderboards", ServiceLeaderboards(size=10)),
+    ):
+        await copy.build(db)
+        monkeypatch.setattr(server, name, copy)
+
+    subscription = Subscription()
+    task = asyncio.create_task(server.follow_service_changes(subscription))
+    yield subscription
+    task.cancel()
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def listed(server):
+    return [s["service_id"] for s in server.service_leaderboards.query(None, None, None, None, None, 10)]
+
+
+@pytest.mark.anyio
+async def test_another_workers_changes_are_applied(server, db, worker):
+    # Another worker deletes a, re-rates and moves b, and creates c
+    before_b = server.facet_fields(service("b", 3.0))
+    await db.services.delete_one({"service_id": "a"})
+    await db.services.update_one({"service_id": "b"}, {"$set": {"rating": 5.0, "district": "Salem"}})
+    await db.services.insert_one(service("c", 4.5, base_price=3000.0))
+    worker.deliver({
+        "type": "services.changed",
+        "service_ids": ["a", "b", "c"],
+        "facets": [
+            [server.facet_fields(service("a", 4.0)), None],
+            [before_b, {**before_b, "district": "Salem"}],
+            [None, server.facet_fields(service("c", 4.5, base_price=3000.0))],
+        ],
+        "origin": "other-worker",
+    })
+    await settle()
+
+    assert listed(server) == ["b", "c"]
+    assert server.service_index.get("a") is None
+    assert server.service_index.get("b")["district"] == "Salem"
+    facets = server.service_facets.snapshot()
+    assert facets["total"] == 2
+    assert facets["districts"] == {"Chennai": 1, "Salem": 1}
+
+
+@pytest.mark.anyio
+async def test_own_changes_are_not_applied_twice(server, db, worker):
+    worker.deliver({
+        "type": "services.changed",
+        "service_ids": ["a"],
+        "facets": [[None, server.facet_fields(service("a", 4.0))]],
+        "origin": server.WORKER_ID,
+    })
+    await settle()
+
+    assert server.service_facets.snapshot()["total"] == 2
+
+
+@pytest.mark.anyio
+async def test_lost_changes_trigger_a_rebuild(server, db, worker):
+    await db.services.insert_one(service("c", 4.5))
+    # Overflowing the queue drops events; the worker starts over from Mongo
+    for _ in range(101):
+        worker.deliver({"type": "services.changed", "service_ids": [], "facets": [], "origin": "other-worker"})
+    await settle()
+
+    assert listed(server) == ["c", "a", "b"]
+    assert server.service_facets.snapshot()["total"] == 3
+
+
+def test_web_concurrency_decides_single_worker(server, monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert not server.runs_single_worker()
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert server.runs_single_worker()
+
+
+def test_uvicorn_worker_processes_are_not_single(server, monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(server.multiprocessing, "parent_process", lambda: object())
+    assert not server.runs_single_worker()
+
+
+@pytest.mark.anyio
+async def test_facets_come_from_mongo_without_trusted_local_copies(server, db, monkeypatch):
+    monkeypatch.setattr(server, "LOCAL_SERVICE_COPIES", False)
+    monkeypatch.setattr(server, "service_facets", ServiceFacets())
+    server.discovery_cache.clear()
+    await db.services.insert_many([service("a", 4.0), service("b", 3.0, district="Salem")])
+
+    facets = await server.get_service_facets()
+
+    assert facets["total"] == 2
+    assert facets["districts"] == {"Chennai": 1, "Salem": 1}
+
+
+# ----- profiles -----
+
+@pytest.mark.anyio
+async def test_profile_changes_are_published_on_a_shared_broker(server, monkeypatch):
+    broker = MemoryEventBroker()
+    monkeypatch.setattr(broker, "shared", True)
+    monkeypatch.setattr(server, "event_broker", broker)
+    server.profile_cache.set("u1", {"name": "Old"})
+
+    async with broker.subscribe(server.USERS_CHANNEL) as subscription:
+        await server.invalidate_profile("u1")
+        event = await subscription.get()
+
+    assert server.profile_cache.get("u1") is None
+    assert event == {"type": "profile.changed", "user_id": "u1", "origin": server.WORKER_ID}
+
+
+@pytest.mark.anyio
+async def test_another_workers_profile_changes_are_applied(server):
+    server.profile_cache.set("u1", {"name": "Old"})
+    server.profile_cache.set("u2", {"name": "Kept"})
+    subscription = Subscription()
+    task = asyncio.create_task(server.follow_profile_changes(subscription))
+
+    subscription.deliver({"type": "profile.changed", "user_id": "u2", "origin": server.WORKER_ID})
+    subscription.deliver({"type": "profile.changed", "user_id": "u1", "origin": "other-worker"})
+    await settle()
+    task.cancel()
+
+    assert server.profile_cache.get("u1") is None
+    assert server.profile_cache.get("u2") == {"name": "Kept"}
+
+
+@pytest.mark.anyio
+async def test_lost_profile_changes_clear_the_cache(server):
+    server.profile_cache.set("u1", {"name": "Old"})
+    subscription = Subscription()
+    task = asyncio.create_task(server.follow_profile_changes(subscription))
+    await settle()
+
+    for _ in range(101):
+        subscription.deliver({"type": "profile.changed", "user_id": "u2", "origin": "other-worker"})
+    await settle()
+    task.cancel()
+
+    assert server.profile_cache.get("u1") is None